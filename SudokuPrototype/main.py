@@ -1,4 +1,3 @@
-from sys import setrecursionlimit
 from sudoku import generate_regular, RegularDimension, RegularDifficulty, RegularInfo
 
 def __regular():
@@ -23,8 +22,6 @@ def __jigsaw():
     pass
 
 if "__main__" == __name__:
-    setrecursionlimit(10000)
-
     __regular()
     __hyper()
     __killer()
@@ -0,0 +1,123 @@
+from asyncio import get_running_loop
+from random import Random, getrandbits
+from typing import Optional
+from concurrent.futures import Executor
+from sudoku.StateError import StateError
+from sudoku.SolverBudget import SolverBudget
+from sudoku.RegularSudoku import RegularSolverEngine, RegularInfo, RegularSudoku
+from sudoku.RegularSolver import _has_unique_solution
+from sudoku.Generation import _initialized_regular
+from sudoku.RegularDifficultyAdjustment import _adjust_for_difficulty_regular
+from sudoku.RegularShuffler import _shuffle_board_regular
+
+def _initialize_stage(info: RegularInfo, seed: int) -> RegularSudoku:
+    """
+    Makes a solved sudoku board. Runs inside the executor. Shall only be called from within the AsyncGeneration.py
+    file
+    :param info: Contains all the parameters needed for making the sudoku board
+    :param seed: The seed of the random number generator used by the stage
+    :return: A solved sudoku board
+    """
+
+    return _initialized_regular(info, Random(seed))
+
+def _adjust_stage(puzzle: RegularSudoku, seed: int, budget: Optional[SolverBudget]) -> RegularSudoku:
+    """
+    Removes givens from a solved sudoku board until its difficulty is reached. Runs inside the executor. Shall only be
+    called from within the AsyncGeneration.py file
+    :param puzzle: The solved sudoku board
+    :param seed: The seed of the random number generator used by the stage
+    :param budget: Limits the work done by each uniqueness check. Unlimited if None
+    :return: The sudoku board with givens removed. A copy of the given board if the stage runs in a worker process
+    """
+
+    _adjust_for_difficulty_regular(puzzle, Random(seed), None, budget)
+
+    return puzzle
+
+def _shuffle_stage(puzzle: RegularSudoku, seed: int) -> RegularSudoku:
+    """
+    Shuffles a sudoku board. Runs inside the executor. Shall only be called from within the AsyncGeneration.py file
+    :param puzzle: The sudoku board to be shuffled
+    :param seed: The seed of the random number generator used by the stage
+    :return: The shuffled sudoku board. A copy of the given board if the stage runs in a worker process
+    """
+
+    _shuffle_board_regular(puzzle, Random(seed))
+
+    return puzzle
+
+def _unique_stage(
+        puzzle: RegularSudoku,
+        engine: Optional[RegularSolverEngine],
+        budget: Optional[SolverBudget]
+) -> Optional[bool]:
+    """
+    Checks whether a sudoku board has exactly one solution. Runs inside the executor. Shall only be called from within
+    the AsyncGeneration.py file
+    :param puzzle: The sudoku board to be checked
+    :param engine: The solver engine to be used. The engine of the board is used if None
+    :param budget: Limits the work done by the check. Unlimited if None
+    :return: True if the board has exactly one solution, False if it has more than one, or None if it has none, is not
+        valid or the budget ran out
+    """
+
+    if not puzzle.is_valid():
+        return None
+
+    try:
+        return _has_unique_solution(puzzle, engine, None, budget)
+    except StateError:
+        return None
+
+async def generate_regular_async(
+        info: RegularInfo,
+        executor: Optional[Executor]=None,
+        budget: Optional[SolverBudget]=None
+) -> RegularSudoku:
+    """
+    Generates a regular sudoku without blocking the event loop. Filling the board, adjusting its difficulty and
+    shuffling it each run as a separate job in the executor, and the board is finalized on the event loop. Cancelling
+    the returned coroutine stops generation before the next stage is started, and a stage that has not started yet is
+    never run. A stage that is already running is left to finish, since threads and processes cannot be interrupted
+    :param info: Contains all the parameters needed for generating the sudoku board in accordance with its
+        intended dimensions and difficulty level
+    :param executor: Runs the stages of generation. Every stage gets a fresh seed for a random number generator of its
+        own, so stages running at the same time never share one. The default executor of the event loop is used if
+        None
+    :param budget: Limits the work done by each uniqueness check made while adjusting the difficulty. A given whose
+        removal cannot be checked within the budget is kept. Unlimited if None
+    :return: A sudoku board for someone to play/solve
+    """
+
+    loop = get_running_loop()
+
+    puzzle = await loop.run_in_executor(executor, _initialize_stage, info, getrandbits(64))
+    puzzle = await loop.run_in_executor(executor, _adjust_stage, puzzle, getrandbits(64), budget)
+    puzzle = await loop.run_in_executor(executor, _shuffle_stage, puzzle, getrandbits(64))
+
+    puzzle._finalize()
+
+    return puzzle
+
+async def check_unique_async(
+        puzzle: RegularSudoku,
+        engine: Optional[RegularSolverEngine]=None,
+        executor: Optional[Executor]=None,
+        budget: Optional[SolverBudget]=None
+) -> Optional[bool]:
+    """
+    Checks whether a sudoku board has exactly one solution without blocking the event loop. Cancelling the returned
+    coroutine before the check has started keeps it from running. A check that is already running is left to finish,
+    so a budget should be given to bound the work done for a cancelled request
+    :param puzzle: The sudoku board to be checked
+    :param engine: The solver engine to be used. The engine of the board is used if None
+    :param executor: Runs the check. The default executor of the event loop is used if None
+    :param budget: Limits the work done by the check. Unlimited if None
+    :return: True if the board has exactly one solution, False if it has more than one, or None if it has none, is not
+        valid or the budget ran out
+    """
+
+    loop = get_running_loop()
+
+    return await loop.run_in_executor(executor, _unique_stage, puzzle, engine, budget)
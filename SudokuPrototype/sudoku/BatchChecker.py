@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Tuple
+from sudoku.RegularSudoku import RegularDimension
+
+try:
+    import numpy
+    import numpy.typing
+except ImportError:
+    numpy = None
+
+def __duplicates(units: numpy.ndarray) -> numpy.ndarray:
+    """
+    Finds the boards that repeat a value within any unit. Shall only be called from within the BatchChecker.py file
+    :param units: Integer array of shape (batch, length, length), where each row of a board holds the cells of one
+        unit. 0 marks an empty cell and every other entry is the position of the value in the legal values plus one
+    :return: Boolean array of shape (batch,) that is True for every board with a repeated value in some unit
+    """
+
+    ordered = numpy.sort(units, axis=2)
+    repeated = (ordered[:, :, 1:] == ordered[:, :, :-1]) & (ordered[:, :, 1:] != 0)
+
+    return repeated.any(axis=(1, 2))
+
+def check_regular_many(
+        boards: numpy.typing.ArrayLike,
+        dimension: RegularDimension
+) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Checks the validity, completeness and solvedness of a whole stack of regular sudoku boards at once. Each board
+    is encoded as the position of every value in the sorted string of legal values plus one, with 0 marking an empty
+    cell. Requires numpy
+    :param boards: Integer array-like of shape (batch, length, length) holding the encoded boards
+    :param dimension: The dimensions shared by every board
+    :return: A tuple of three boolean arrays of shape (batch,). The first is True for every board whose filled cells
+        do not conflict, the second for every board with no empty cells and the third for every board that is both
+    :raises ImportError: If numpy is not installed
+    :raises ValueError: If the boards do not have the shape of the given dimensions
+    """
+
+    if numpy is None:
+        raise ImportError("numpy is required for batch checking")
+
+    dimensionDict = dimension.value
+    length = dimensionDict["length"]
+    boxRows = dimensionDict["boxRows"]
+    boxCols = dimensionDict["boxCols"]
+
+    boards = numpy.asarray(boards)
+
+    if 3 != boards.ndim or boards.shape[1:] != (length, length):
+        raise ValueError(f"Boards must have shape (batch, {length}, {length}): {boards.shape}")
+
+    batch = boards.shape[0]
+    flat = boards.reshape(batch, length * length)
+
+    legal = ((flat >= 0) & (flat <= length)).all(axis=1)
+    complete = (flat != 0).all(axis=1)
+
+    units = numpy.where(legal[:, None, None], boards, 0)
+    boxes = units.reshape(batch, length // boxRows, boxRows, length // boxCols, boxCols).transpose(0, 1, 3, 2, 4)
+
+    rowDuplicates = __duplicates(units)
+    colDuplicates = __duplicates(units.transpose(0, 2, 1))
+    boxDuplicates = __duplicates(boxes.reshape(batch, length, length))
+
+    valid = legal & ~(rowDuplicates | colDuplicates | boxDuplicates)
+    complete &= legal
+
+    return (valid, complete, valid & complete)
@@ -0,0 +1,256 @@
+from os import cpu_count
+from typing import List, Tuple, Optional, Iterable, Iterator, Callable, Any
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, Future, FIRST_COMPLETED, wait
+from sudoku.RegularSudoku import RegularSolverEngine, RegularSudoku
+from sudoku.RegularSolver import _grid_solutions, _count_solutions
+
+_Encoding = Optional[Tuple[int, int, int, RegularSolverEngine, bytes]]
+"""
+Compact form of a sudoku board that is sent to the worker processes. Holds the length, box rows, box columns, solver
+engine and the value index of every cell plus one in row-major order, where 0 marks an empty cell. None marks a board
+that is not valid and is never sent
+"""
+
+def __encode(puzzle: RegularSudoku, engine: Optional[RegularSolverEngine]) -> _Encoding:
+    """
+    Encodes the given sudoku board into its compact form. Shall only be called from within the BatchSolver.py file
+    :param puzzle: The sudoku board to be encoded
+    :param engine: The solver engine to be used. The engine of the board's dimensions is used if None
+    :return: The compact form of the sudoku board or None if the board is not valid
+    """
+
+    if not puzzle.is_valid():
+        return None
+
+    if engine is None:
+        engine = puzzle.engine
+
+    cells = bytes(valueIndex + 1 for valueIndex in puzzle._grid())
+
+    return (puzzle.length, puzzle.box_rows, puzzle.box_cols, engine, cells)
+
+def __encoded_solutions(encoding: Tuple[int, int, int, RegularSolverEngine, bytes]) -> Iterator[List[int]]:
+    """
+    Decodes the given board and starts searching for its solutions. Shall only be called from within the
+    BatchSolver.py file
+    :param encoding: The compact form of the sudoku board to be solved
+    :return: An iterator over the solutions of the board as row-major lists of value indices
+    """
+
+    (length, boxRows, boxCols, engine, cells) = encoding
+    grid = [value - 1 for value in cells]
+
+    return _grid_solutions(grid, length, boxRows, boxCols, engine)
+
+def _solve_chunk(encodings: List[_Encoding], maxSolutions: Optional[int]) -> List[List[bytes]]:
+    """
+    Solves every board of a chunk. Runs inside a worker process. Shall only be called from within the BatchSolver.py
+    file
+    :param encodings: The compact forms of the sudoku boards to be solved
+    :param maxSolutions: The number of solutions after which the search of each board stops. Every solution is found
+        if None
+    :return: The solutions of every board, each as the bytes of its row-major value indices
+    """
+
+    results = []
+
+    for encoding in encodings:
+        found = []
+
+        if encoding is not None:
+            solutions = __encoded_solutions(encoding)
+
+            for solution in solutions:
+                found.append(bytes(solution))
+
+                if maxSolutions is not None and len(found) >= maxSolutions:
+                    break
+
+            solutions.close()
+
+        results.append(found)
+
+    return results
+
+def _check_unique_chunk(encodings: List[_Encoding]) -> List[Optional[bool]]:
+    """
+    Checks every board of a chunk for a unique solution. Runs inside a worker process. Shall only be called from
+    within the BatchSolver.py file
+    :param encodings: The compact forms of the sudoku boards to be checked
+    :return: For every board, True if it has exactly one solution, False if it has more than one or None if it has
+        none
+    """
+
+    results = []
+
+    for encoding in encodings:
+        solutionCount = 0 if encoding is None else _count_solutions(__encoded_solutions(encoding))
+
+        results.append(None if 0 == solutionCount else 1 == solutionCount)
+
+    return results
+
+def __chunks(
+        puzzles: Iterable[RegularSudoku],
+        engine: Optional[RegularSolverEngine],
+        chunkSize: int
+) -> Iterator[Tuple[List[RegularSudoku], List[_Encoding]]]:
+    """
+    Lazily groups the given sudoku boards into chunks and encodes each chunk. Shall only be called from within the
+    BatchSolver.py file
+    :param puzzles: The sudoku boards to be grouped
+    :param engine: The solver engine to be used. The engine of each board's dimensions is used if None
+    :param chunkSize: The number of boards in each chunk. The last chunk may be smaller
+    :return: An iterator over every chunk along with the compact forms of its boards
+    """
+
+    iterator = iter(puzzles)
+
+    while True:
+        chunk = list(islice(iterator, chunkSize))
+
+        if 0 == len(chunk):
+            return
+
+        yield (chunk, [__encode(puzzle, engine) for puzzle in chunk])
+
+def __run(
+        puzzles: Iterable[RegularSudoku],
+        task: Callable[..., List[Any]],
+        arguments: Tuple,
+        decode: Callable[[RegularSudoku, Any], Any],
+        engine: Optional[RegularSolverEngine],
+        workers: Optional[int],
+        chunk_size: int,
+        ordered: bool
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Spreads the given sudoku boards across a process pool in chunks and yields the result of every board. Only a few
+    chunks per worker are in flight at once, so the boards are read from the iterable as the work progresses. Shall
+    only be called from within the BatchSolver.py file
+    :param puzzles: The sudoku boards to be processed
+    :param task: The function that processes one chunk of encoded boards inside a worker process
+    :param arguments: The arguments passed to the task after the chunk
+    :param decode: Converts the result of one board from a worker process into the result that is yielded
+    :param engine: The solver engine to be used. The engine of each board's dimensions is used if None
+    :param workers: The number of worker processes. The number of processors on the machine is used if None
+    :param chunk_size: The number of boards sent to a worker process at once
+    :param ordered: Whether results are yielded in input order rather than in the order that they are completed in
+    :return: An iterator over pairs of the position of each board in the input and its result
+    """
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = __chunks(puzzles, engine, chunk_size)
+        limit = 2 * (workers or cpu_count() or 1)
+        pending: List[Tuple[int, List[RegularSudoku], Future]] = []
+        start = 0
+
+        try:
+            while True:
+                for (chunk, encodings) in islice(chunks, limit - len(pending)):
+                    pending.append((start, chunk, executor.submit(task, encodings, *arguments)))
+                    start += len(chunk)
+
+                if 0 == len(pending):
+                    return
+
+                if ordered:
+                    done = pending[0]
+                else:
+                    wait([future for (_, _, future) in pending], return_when=FIRST_COMPLETED)
+                    done = next(entry for entry in pending if entry[2].done())
+
+                pending.remove(done)
+
+                (offset, chunk, future) = done
+
+                for (index, (puzzle, result)) in enumerate(zip(chunk, future.result()), offset):
+                    yield (index, decode(puzzle, result))
+        finally:
+            for (_, _, future) in pending:
+                future.cancel()
+
+def __decode_solutions(puzzle: RegularSudoku, solutions: List[bytes]) -> List[List[List[str]]]:
+    """
+    Converts the solutions of a board from a worker process into lists of rows of values. Shall only be called from
+    within the BatchSolver.py file
+    :param puzzle: The sudoku board that was solved
+    :param solutions: The solutions of the board, each as the bytes of its row-major value indices
+    :return: The solutions of the board, each as a list of rows, where each row is a list of the values in that row
+    """
+
+    length = puzzle.length
+    legalValues = puzzle.legal
+
+    return [
+        [[legalValues[valueIndex] for valueIndex in solution[rowIndex * length:(rowIndex + 1) * length]] for rowIndex in range(length)]
+        for solution in solutions
+    ]
+
+def __decode_unique(puzzle: RegularSudoku, unique: Optional[bool]) -> Optional[bool]:
+    """
+    Returns the uniqueness result of a board from a worker process unchanged. Shall only be called from within the
+    BatchSolver.py file
+    :param puzzle: The sudoku board that was checked
+    :param unique: The uniqueness result of the board
+    :return: The uniqueness result of the board
+    """
+
+    return unique
+
+def solve_many(
+        puzzles: Iterable[RegularSudoku],
+        max_solutions: Optional[int]=2,
+        engine: Optional[RegularSolverEngine]=None,
+        workers: Optional[int]=None,
+        chunk_size: int=64,
+        ordered: bool=True
+) -> Iterator[Tuple[int, List[List[List[str]]]]]:
+    """
+    Solves many sudoku boards across a pool of worker processes. The boards are sent to the workers in a compact
+    encoding and are left unchanged
+    :param puzzles: The sudoku boards to be solved. Their current values are treated as givens
+    :param max_solutions: The number of solutions after which the search of each board stops. Two are enough to tell
+        a unique board from one with several solutions. Every solution is found if None, which can take a very long
+        time and a lot of memory for a board with few givens, so None shall only be passed deliberately
+    :param engine: The solver engine to be used. The engine of each board's dimensions is used if None
+    :param workers: The number of worker processes. The number of processors on the machine is used if None
+    :param chunk_size: The number of boards sent to a worker process at once
+    :param ordered: Whether results are yielded in input order. They are yielded as soon as they are completed if False
+    :return: An iterator over pairs of the position of each board in the input and its solutions. Each solution is a
+        list of rows, where each row is a list of the values in that row. A board that is not valid has no solutions
+    :raises ValueError: If max_solutions or chunk_size is less than 1
+    """
+
+    if max_solutions is not None and max_solutions < 1:
+        raise ValueError(f"max_solutions must be at least 1: {max_solutions}")
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1: {chunk_size}")
+
+    return __run(puzzles, _solve_chunk, (max_solutions,), __decode_solutions, engine, workers, chunk_size, ordered)
+
+def check_unique_many(
+        puzzles: Iterable[RegularSudoku],
+        engine: Optional[RegularSolverEngine]=None,
+        workers: Optional[int]=None,
+        chunk_size: int=64,
+        ordered: bool=True
+) -> Iterator[Tuple[int, Optional[bool]]]:
+    """
+    Checks many sudoku boards for a unique solution across a pool of worker processes. The boards are sent to the
+    workers in a compact encoding and are left unchanged
+    :param puzzles: The sudoku boards to be checked. Their current values are treated as givens
+    :param engine: The solver engine to be used. The engine of each board's dimensions is used if None
+    :param workers: The number of worker processes. The number of processors on the machine is used if None
+    :param chunk_size: The number of boards sent to a worker process at once
+    :param ordered: Whether results are yielded in input order. They are yielded as soon as they are completed if False
+    :return: An iterator over pairs of the position of each board in the input and its result. The result is True if
+        the board has exactly one solution, False if it has more than one and None if it has none or is not valid
+    :raises ValueError: If chunk_size is less than 1
+    """
+
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1: {chunk_size}")
+
+    return __run(puzzles, _check_unique_chunk, (), __decode_unique, engine, workers, chunk_size, ordered)
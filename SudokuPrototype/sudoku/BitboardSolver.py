@@ -0,0 +1,312 @@
+from typing import List, Dict, Tuple, Optional, Iterator
+from sudoku.SolverStats import SolverStats
+from sudoku.SolverBudget import _BudgetCounter
+
+__geometries: Dict[Tuple[int, int, int], Tuple[List[int], List[int], List[int], List[List[int]]]] = {}
+"""
+Cache of the row, column and box index of every cell and of the cells of every unit for each board shape. Shall only
+be accessed from within the BitboardSolver.py file
+"""
+
+def __geometry(length: int, boxRows: int, boxCols: int) -> Tuple[List[int], List[int], List[int], List[List[int]]]:
+    """
+    Returns the row, column and box index of every cell of a board with the given shape, indexed in row-major order,
+    along with the cell indices of every row, column and box. Shall only be called from within the BitboardSolver.py
+    file
+    :param length: The number of rows and columns of the board
+    :param boxRows: The number of rows in each box of the board
+    :param boxCols: The number of columns in each box of the board
+    :return: A tuple containing the row, column and box index lists and the list of units
+    """
+
+    key = (length, boxRows, boxCols)
+    geometry = __geometries.get(key)
+
+    if geometry is None:
+        rows = []
+        cols = []
+        boxes = []
+        units = [[] for _ in range(3 * length)]
+
+        for rowIndex in range(length):
+            for colIndex in range(length):
+                boxIndex = rowIndex // boxRows * (length // boxCols) + colIndex // boxCols
+                index = len(rows)
+
+                rows.append(rowIndex)
+                cols.append(colIndex)
+                boxes.append(boxIndex)
+
+                units[rowIndex].append(index)
+                units[length + colIndex].append(index)
+                units[2 * length + boxIndex].append(index)
+
+        geometry = (rows, cols, boxes, units)
+        __geometries[key] = geometry
+
+    return geometry
+
+def __propagate(
+        cells: List[int],
+        empties: List[int],
+        positions: List[int],
+        remaining: List[int],
+        depth: int,
+        safety: Tuple[List[int], List[int], List[int]],
+        geometry: Tuple[List[int], List[int], List[int], List[List[int]]],
+        full: int
+) -> Tuple[int, bool]:
+    """
+    Fills naked singles and hidden singles in every row, column and box until nothing changes. The units are only
+    scanned for hidden singles once a pass finds no naked singles, since that scan is the costlier one. Each forced
+    value is pushed onto the search stack with no remaining alternatives, so backtracking undoes it along with the
+    branch that caused it. Shall only be called from within the BitboardSolver.py file
+    :param cells: The value index of every cell. -1 marks an empty cell
+    :param empties: The cells that were empty before the search started. Those before the depth are filled
+    :param positions: The position of every initially empty cell within the list of empty cells
+    :param remaining: The candidates that are still untried at each filled position
+    :param depth: The number of initially empty cells that are currently filled
+    :param safety: The bitmasks of the values that are still safe in each row, column and box
+    :param geometry: The row, column and box index of every cell and the cells of every unit
+    :param full: The bitmask with a bit set for every value
+    :return: A tuple containing the new depth and False if a contradiction was found, True otherwise
+    """
+
+    (rowSafety, colSafety, boxSafety) = safety
+    (rows, cols, boxes, units) = geometry
+    emptyCount = len(empties)
+    changed = True
+
+    while changed:
+        changed = False
+        forced = []
+
+        for position in range(depth, emptyCount):
+            index = empties[position]
+            candidates = rowSafety[rows[index]] & colSafety[cols[index]] & boxSafety[boxes[index]]
+
+            if 0 == candidates:
+                return (depth, False)
+            elif 0 == candidates & (candidates - 1):
+                forced.append((index, candidates))
+
+        if 0 == len(forced):
+            for unit in units:
+                once = 0
+                twice = 0
+                placed = 0
+
+                for index in unit:
+                    valueIndex = cells[index]
+
+                    if -1 == valueIndex:
+                        candidates = rowSafety[rows[index]] & colSafety[cols[index]] & boxSafety[boxes[index]]
+                        twice |= once & candidates
+                        once |= candidates
+                    else:
+                        placed |= 1 << valueIndex
+
+                if full != once | placed:
+                    return (depth, False)
+
+                hidden = once & ~twice
+
+                while 0 != hidden:
+                    mask = hidden & -hidden
+                    hidden ^= mask
+
+                    for index in unit:
+                        if -1 == cells[index] and 0 != rowSafety[rows[index]] & colSafety[cols[index]] & boxSafety[boxes[index]] & mask:
+                            forced.append((index, mask))
+
+                            break
+
+        for (index, mask) in forced:
+            if -1 != cells[index]:
+                if mask != 1 << cells[index]:
+                    return (depth, False)
+
+                continue
+
+            rowIndex = rows[index]
+            colIndex = cols[index]
+            boxIndex = boxes[index]
+
+            if 0 == rowSafety[rowIndex] & colSafety[colIndex] & boxSafety[boxIndex] & mask:
+                return (depth, False)
+
+            position = positions[index]
+            other = empties[depth]
+            (empties[depth], empties[position]) = (index, other)
+            (positions[index], positions[other]) = (depth, position)
+
+            remaining[depth] = 0
+            cells[index] = mask.bit_length() - 1
+            rowSafety[rowIndex] ^= mask
+            colSafety[colIndex] ^= mask
+            boxSafety[boxIndex] ^= mask
+
+            depth += 1
+            changed = True
+
+    return (depth, True)
+
+def _bitboard_solutions(
+        grid: List[int],
+        length: int,
+        boxRows: int,
+        boxCols: int,
+        valueOrders: Optional[List[List[int]]]=None,
+        stats: Optional[SolverStats]=None,
+        counter: Optional[_BudgetCounter]=None
+) -> Iterator[List[int]]:
+    """
+    Searches for every solution of the given board directly on per-row, per-column and per-box bitmasks of the values
+    that are still safe to place. Naked and hidden singles are filled in before the first branch and after every
+    branch, and the search then branches on the empty cell with the fewest candidates. Each solution is
+    yielded as a row-major list of value indices. The yielded list is reused by the search. Shall only be called from
+    within the sudoku package
+    :param grid: The value index of every cell of the board in row-major order. -1 marks an empty cell
+    :param length: The number of rows and columns of the board
+    :param boxRows: The number of rows in each box of the board
+    :param boxCols: The number of columns in each box of the board
+    :param valueOrders: The order that value indices are tried in for each cell. Values are tried from lowest to
+        highest if None
+    :param stats: Collects statistics about the search. Values filled in as singles count as placements but not as
+        nodes. Nothing is recorded if None
+    :param counter: Charged for the work done by the search. Unlimited if None
+    :return: An iterator over every solution of the board. Yields nothing if the givens conflict
+    :raises _BudgetExhausted: If the budget of the counter runs out
+    """
+
+    geometry = __geometry(length, boxRows, boxCols)
+    (rows, cols, boxes, _) = geometry
+    full = ~(~0 << length)
+    rowSafety = [full] * length
+    colSafety = [full] * length
+    boxSafety = [full] * length
+    cells = grid[:]
+    empties = []
+
+    for (index, valueIndex) in enumerate(cells):
+        if -1 == valueIndex:
+            empties.append(index)
+        else:
+            rowIndex = rows[index]
+            colIndex = cols[index]
+            boxIndex = boxes[index]
+            mask = 1 << valueIndex
+
+            if 0 == rowSafety[rowIndex] & colSafety[colIndex] & boxSafety[boxIndex] & mask:
+                return
+
+            rowSafety[rowIndex] ^= mask
+            colSafety[colIndex] ^= mask
+            boxSafety[boxIndex] ^= mask
+
+    emptyCount = len(empties)
+    positions = [0] * len(cells)
+    remaining = [0] * emptyCount
+    safety = (rowSafety, colSafety, boxSafety)
+    depth = 0
+    descend = True
+
+    for (position, index) in enumerate(empties):
+        positions[index] = position
+
+    while True:
+        if descend:
+            forcedDepth = depth
+            (depth, descend) = __propagate(cells, empties, positions, remaining, depth, safety, geometry, full)
+
+            if stats is not None:
+                stats._cover(depth - forcedDepth)
+
+        if descend:
+            if depth == emptyCount:
+                yield cells
+
+                descend = False
+            else:
+                best = depth
+                bestCandidates = 0
+                bestCount = length + 1
+
+                for position in range(depth, emptyCount):
+                    index = empties[position]
+                    candidates = rowSafety[rows[index]] & colSafety[cols[index]] & boxSafety[boxes[index]]
+                    count = candidates.bit_count()
+
+                    if count < bestCount:
+                        best = position
+                        bestCandidates = candidates
+                        bestCount = count
+
+                        if count <= 1:
+                            break
+
+                if 0 == bestCount:
+                    descend = False
+                else:
+                    other = empties[depth]
+                    index = empties[best]
+                    (empties[depth], empties[best]) = (index, other)
+                    (positions[index], positions[other]) = (depth, best)
+                    remaining[depth] = bestCandidates
+
+                    if stats is not None:
+                        stats._branch(depth, bestCount)
+
+                    depth += 1
+
+        if not descend:
+            depth -= 1
+
+            if depth < 0:
+                return
+
+            index = empties[depth]
+            valueIndex = cells[index]
+
+            if -1 != valueIndex:
+                mask = 1 << valueIndex
+
+                rowSafety[rows[index]] |= mask
+                colSafety[cols[index]] |= mask
+                boxSafety[boxes[index]] |= mask
+                cells[index] = -1
+
+                if stats is not None:
+                    stats._uncover()
+
+            if 0 == remaining[depth]:
+                continue
+
+            depth += 1
+            descend = True
+
+        position = depth - 1
+        index = empties[position]
+        candidates = remaining[position]
+
+        if valueOrders is None:
+            mask = candidates & -candidates
+        else:
+            for valueIndex in valueOrders[index]:
+                mask = 1 << valueIndex
+
+                if 0 != candidates & mask:
+                    break
+
+        remaining[position] = candidates ^ mask
+        cells[index] = mask.bit_length() - 1
+
+        if stats is not None:
+            stats._node(depth)
+            stats._cover()
+        if counter is not None:
+            counter._spend()
+
+        rowSafety[rows[index]] ^= mask
+        colSafety[cols[index]] ^= mask
+        boxSafety[boxes[index]] ^= mask
@@ -0,0 +1,437 @@
+from __future__ import annotations
+
+from typing import List, Iterable, Iterator, Sequence, Callable, Optional
+from final_class import final
+from sudoku.SolverStats import SolverStats
+from sudoku.SolverBudget import _BudgetCounter
+
+@final
+class _ExactCoverMatrix:
+    """
+    Sparse exact cover matrix stored as dancing links. Every node is identified by an integer id and its links are
+    kept in parallel lists of integers indexed by that id. Id 0 is the root, ids 1 to the column count are the column
+    headers and the remaining ids are the nodes of the candidate rows, in row order. Shall only be used from within
+    the sudoku package
+    """
+
+    def __init__(self, colCount: int, rows: Iterable[Sequence[int]]):
+        """
+        Links the given candidate rows into a new matrix
+        :param colCount: The number of columns in the matrix
+        :param rows: The column indices of each candidate row. Column indices start at 0
+        """
+
+        headerCount = colCount + 1
+        up = list(range(headerCount))
+        down = list(range(headerCount))
+        left = [colCount] + list(range(colCount))
+        right = list(range(1, headerCount)) + [0]
+        column = list(range(headerCount))
+        size = [0] * headerCount
+        rowIndices = [-1] * headerCount
+        firstNodes = []
+
+        for (rowIndex, row) in enumerate(rows):
+            first = len(up)
+            last = first + len(row) - 1
+
+            firstNodes.append(first)
+
+            for (offset, col) in enumerate(row):
+                node = first + offset
+                header = col + 1
+
+                up.append(up[header])
+                down.append(header)
+                down[up[header]] = node
+                up[header] = node
+
+                left.append(last if node == first else node - 1)
+                right.append(first if node == last else node + 1)
+
+                column.append(header)
+                rowIndices.append(rowIndex)
+                size[header] += 1
+
+        self.__up: List[int] = up
+        """
+        The id of the node above each node
+        """
+
+        self.__down: List[int] = down
+        """
+        The id of the node below each node
+        """
+
+        self.__left: List[int] = left
+        """
+        The id of the node left of each node
+        """
+
+        self.__right: List[int] = right
+        """
+        The id of the node right of each node
+        """
+
+        self.__column: List[int] = column
+        """
+        The id of the column header of each node
+        """
+
+        self.__size: List[int] = size
+        """
+        The number of nodes currently linked into each column. Indexed by column header id
+        """
+
+        self.__rowIndices: List[int] = rowIndices
+        """
+        The index of the candidate row each node belongs to. -1 for the root and column headers. Never changes, so it
+        is shared between copies
+        """
+
+        self.__firstNodes: List[int] = firstNodes
+        """
+        The id of the first node of each candidate row. Never changes, so it is shared between copies
+        """
+
+    def copy(self) -> _ExactCoverMatrix:
+        """
+        Makes an independent copy of this matrix in its current state
+        :return: The copy of this matrix
+        """
+
+        other = _ExactCoverMatrix.__new__(_ExactCoverMatrix)
+
+        other.__up = self.__up[:]
+        other.__down = self.__down[:]
+        other.__left = self.__left[:]
+        other.__right = self.__right[:]
+        other.__column = self.__column
+        other.__size = self.__size[:]
+        other.__rowIndices = self.__rowIndices
+        other.__firstNodes = self.__firstNodes
+
+        return other
+
+    def row_index(self, node: int) -> int:
+        """
+        Returns the index of the candidate row that the given node belongs to
+        :param node: The id of a node belonging to a candidate row
+        :return: The index of the candidate row that the given node belongs to
+        """
+
+        return self.__rowIndices[node]
+
+    def cover(self, col: int):
+        """
+        Removes the given column from the header list and removes every row that intersects it from the other
+        columns
+        :param col: The id of the column header to be covered
+        """
+
+        up = self.__up
+        down = self.__down
+        right = self.__right
+        column = self.__column
+        size = self.__size
+
+        left = self.__left[col]
+        nextCol = right[col]
+        right[left] = nextCol
+        self.__left[nextCol] = left
+
+        node1 = down[col]
+
+        while node1 != col:
+            node2 = right[node1]
+
+            while node2 != node1:
+                above = up[node2]
+                below = down[node2]
+                down[above] = below
+                up[below] = above
+                size[column[node2]] -= 1
+
+                node2 = right[node2]
+
+            node1 = down[node1]
+
+    def uncover(self, col: int):
+        """
+        Undoes the most recent cover of the given column. Columns shall be uncovered in the reverse order that they
+        were covered in
+        :param col: The id of the column header to be uncovered
+        """
+
+        up = self.__up
+        down = self.__down
+        left = self.__left
+        column = self.__column
+        size = self.__size
+
+        node1 = up[col]
+
+        while node1 != col:
+            node2 = left[node1]
+
+            while node2 != node1:
+                size[column[node2]] += 1
+                down[up[node2]] = node2
+                up[down[node2]] = node2
+
+                node2 = left[node2]
+
+            node1 = up[node1]
+
+        self.__right[left[col]] = col
+        left[self.__right[col]] = col
+
+    def select_row(self, rowIndex: int):
+        """
+        Covers every column of the given candidate row, committing the row to the solution
+        :param rowIndex: The index of the candidate row to be selected
+        """
+
+        first = self.__firstNodes[rowIndex]
+        node = first
+
+        while True:
+            self.cover(self.__column[node])
+
+            node = self.__right[node]
+
+            if node == first:
+                return
+
+    def deselect_row(self, rowIndex: int):
+        """
+        Undoes the most recent selection of the given candidate row
+        :param rowIndex: The index of the candidate row to be deselected
+        """
+
+        first = self.__firstNodes[rowIndex]
+        node = self.__left[first]
+
+        while True:
+            self.uncover(self.__column[node])
+
+            if node == first:
+                return
+
+            node = self.__left[node]
+
+    def hide_row(self, rowIndex: int):
+        """
+        Unlinks the given candidate row from every column it intersects, so that no search can choose it. The columns
+        stay uncovered
+        :param rowIndex: The index of the candidate row to be hidden
+        """
+
+        up = self.__up
+        down = self.__down
+        column = self.__column
+        size = self.__size
+        first = self.__firstNodes[rowIndex]
+        node = first
+
+        while True:
+            down[up[node]] = down[node]
+            up[down[node]] = up[node]
+            size[column[node]] -= 1
+
+            node = self.__right[node]
+
+            if node == first:
+                return
+
+    def unhide_row(self, rowIndex: int):
+        """
+        Undoes the most recent hiding of the given candidate row
+        :param rowIndex: The index of the candidate row to be linked back in
+        """
+
+        up = self.__up
+        down = self.__down
+        column = self.__column
+        size = self.__size
+        first = self.__firstNodes[rowIndex]
+        node = self.__left[first]
+
+        while True:
+            size[column[node]] += 1
+            down[up[node]] = node
+            up[down[node]] = node
+
+            if node == first:
+                return
+
+            node = self.__left[node]
+
+    def __choose_next_column(self) -> int:
+        """
+        Finds the remaining column with the fewest rows. A column with one row forces that row without branching, so
+        the scan stops at the first column with at most one row rather than looking further for an empty one. Shall
+        only be called from within the _ExactCoverMatrix class
+        :return: The id of the remaining column with the fewest rows, or of the first one found with at most one row
+        """
+
+        right = self.__right
+        size = self.__size
+        minimum = None
+        nextToUse = 0
+        col = right[0]
+
+        while 0 != col:
+            colSize = size[col]
+
+            if minimum is None or colSize < minimum:
+                minimum = colSize
+                nextToUse = col
+
+                if colSize <= 1:
+                    break
+
+            col = right[col]
+
+        return nextToUse
+
+    @staticmethod
+    def __counted(action: Callable[[int], None], record: Callable[[], None]) -> Callable[[int], None]:
+        """
+        Wraps a cover or uncover so that every call is recorded. Shall only be called from within the
+        _ExactCoverMatrix class
+        :param action: The cover or uncover to be wrapped
+        :param record: Records a single call
+        :return: The wrapped cover or uncover
+        """
+
+        def counted(col: int):
+            record()
+            action(col)
+
+        return counted
+
+    def search(self, stats: Optional[SolverStats]=None, counter: Optional[_BudgetCounter]=None) -> Iterator[List[int]]:
+        """
+        Searches for every exact cover of the remaining columns with an explicit stack. Each time a cover is found,
+        the ids of the chosen row nodes are yielded. The yielded list is reused by the search. Every cover made by
+        the search is undone once the search finishes or is closed early
+        :param stats: Collects statistics about the search. Nothing is recorded if None
+        :param counter: Charged for the work done by the search. Unlimited if None
+        :return: An iterator over the chosen row nodes of every exact cover
+        :raises _BudgetExhausted: If the budget of the counter runs out. The search is unwound first
+        """
+
+        down = self.__down
+        right = self.__right
+        left = self.__left
+        column = self.__column
+        cover = self.cover
+        uncover = self.uncover
+        chosen: List[int] = []
+
+        if stats is not None:
+            cover = _ExactCoverMatrix.__counted(cover, stats._cover)
+            uncover = _ExactCoverMatrix.__counted(uncover, stats._uncover)
+
+        try:
+            while True:
+                if 0 == right[0]:
+                    yield chosen
+                else:
+                    col = self.__choose_next_column()
+
+                    if 0 != self.__size[col]:
+                        if stats is not None:
+                            stats._branch(len(chosen), self.__size[col])
+
+                        cover(col)
+
+                        rowNode = down[col]
+                        node = right[rowNode]
+
+                        while node != rowNode:
+                            cover(column[node])
+
+                            node = right[node]
+
+                        chosen.append(rowNode)
+
+                        if stats is not None:
+                            stats._node(len(chosen))
+                        if counter is not None:
+                            counter._spend()
+
+                        continue
+
+                while 0 != len(chosen):
+                    rowNode = chosen.pop()
+                    node = left[rowNode]
+
+                    while node != rowNode:
+                        uncover(column[node])
+
+                        node = left[node]
+
+                    col = column[rowNode]
+                    rowNode = down[rowNode]
+
+                    if rowNode != col:
+                        node = right[rowNode]
+
+                        while node != rowNode:
+                            cover(column[node])
+
+                            node = right[node]
+
+                        chosen.append(rowNode)
+
+                        if stats is not None:
+                            stats._node(len(chosen))
+                        if counter is not None:
+                            counter._spend()
+
+                        break
+
+                    uncover(col)
+                else:
+                    return
+        finally:
+            while 0 != len(chosen):
+                rowNode = chosen.pop()
+                node = left[rowNode]
+
+                while node != rowNode:
+                    uncover(column[node])
+
+                    node = left[node]
+
+                uncover(column[rowNode])
+
+    def count_solutions(
+            self,
+            limit: int=2,
+            stats: Optional[SolverStats]=None,
+            counter: Optional[_BudgetCounter]=None
+    ) -> int:
+        """
+        Counts the exact covers of the remaining columns, stopping once the limit is reached
+        :param limit: The number of solutions after which counting stops
+        :param stats: Collects statistics about the search. Nothing is recorded if None
+        :param counter: Charged for the work done by the search. Unlimited if None
+        :return: The number of solutions found, at most the limit
+        :raises _BudgetExhausted: If the budget of the counter runs out. The search is unwound first
+        """
+
+        count = 0
+        solutions = self.search(stats, counter)
+
+        for _ in solutions:
+            count += 1
+
+            if count >= limit:
+                break
+
+        solutions.close()
+
+        return count
@@ -1,9 +1,18 @@
-from typing import List
+from os import getpid, cpu_count
+from time import perf_counter
+from random import Random, getrandbits
+from typing import List, Optional, Tuple, Iterator, Set, Dict
+from concurrent.futures import ProcessPoolExecutor, Future, FIRST_COMPLETED, wait
 from sudoku.ValueInitialization import _initialize_values
-from sudoku.RegularDifficultyAdjustment import _adjust_for_difficulty_regular
-from sudoku.RegularShuffler import _shuffle_board_regular
+from sudoku.RegularDifficultyAdjustment import _adjust_for_difficulty_regular, _adjust_for_difficulty_ladder_regular
+from sudoku.RegularShuffler import _shuffle_board_regular, _random_isomorph
 from sudoku.Cell import _Cell
-from sudoku.RegularSudoku import _RegularSafety, RegularInfo, RegularSudoku
+from sudoku.SolverStats import SolverStats
+from sudoku.SolverBudget import SolverBudget
+from sudoku.GenerationThroughput import GenerationThroughput
+from sudoku.RegularSudoku import _RegularSafety, RegularDimension, RegularDifficulty, RegularInfo, RegularSudoku
+
+__LADDER_NODES_PER_CELL = 5
 
 def __make_cells(length: int) -> List[_Cell]:
     """
@@ -21,27 +30,301 @@ def __make_cells(length: int) -> List[_Cell]:
 
     return cells
 
-def generate_regular(info: RegularInfo) -> RegularSudoku:
+def _initialized_regular(
+        info: RegularInfo,
+        generator: Random,
+        valueOrders: Optional[List[List[int]]]=None
+) -> RegularSudoku:
+    """
+    Makes a regular sudoku board and completely fills it with values. Shall only be called from within the sudoku
+    package
+    :param info: Contains all the parameters needed for making the sudoku board
+    :param generator: The random number generator that every random choice made while filling the board is drawn from
+    :param valueOrders: A list of value indices for every cell, reused by the solver engine between boards of the
+        same dimensions. New lists are made if None
+    :return: A solved sudoku board that givens have not yet been removed from
+    """
+
+    legalValues = list(info.legal)
+    length = info.length
+
+    table = __make_cells(length)
+    safety = _RegularSafety(length)
+
+    puzzle = RegularSudoku(info, table, safety)
+
+    _initialize_values(puzzle, legalValues, generator, info.engine, info.fill, valueOrders)
+
+    return puzzle
+
+def __generate(
+        info: RegularInfo,
+        generator: Random,
+        valueOrders: Optional[List[List[int]]],
+        stats: Optional[SolverStats],
+        budget: Optional[SolverBudget]
+) -> RegularSudoku:
+    """
+    Fills, adjusts, shuffles and finalizes a regular sudoku, drawing every random choice from the given generator.
+    Shall only be called from within the Generation.py file
+    :param info: Contains all the parameters needed for generating the sudoku board
+    :param generator: The random number generator that every random choice is drawn from
+    :param valueOrders: A list of value indices for every cell, reused by the solver engine between boards of the
+        same dimensions. New lists are made if None
+    :param stats: Collects statistics about every uniqueness check made while adjusting the difficulty. Nothing is
+        recorded if None
+    :param budget: Limits the work done by each uniqueness check made while adjusting the difficulty. Unlimited if
+        None
+    :return: A sudoku board for someone to play/solve
+    """
+
+    puzzle = _initialized_regular(info, generator, valueOrders)
+
+    _adjust_for_difficulty_regular(puzzle, generator, stats, budget)
+    _shuffle_board_regular(puzzle, generator)
+
+    puzzle._finalize()
+
+    return puzzle
+
+def generate_regular(
+        info: RegularInfo,
+        stats: Optional[SolverStats]=None,
+        budget: Optional[SolverBudget]=None
+) -> RegularSudoku:
     """
     Generates a regular sudoku with the provided info parameters specifying the criteria to be used when making
     the sudoku board
     :param info: Contains all the parameters needed for generating the sudoku board in accordance with its
         intended dimensions and difficulty level
+    :param stats: Collects statistics about every uniqueness check made while adjusting the difficulty. Nothing is
+        recorded if None
+    :param budget: Limits the work done by each uniqueness check made while adjusting the difficulty. A given whose
+        removal cannot be checked within the budget is kept. Unlimited if None
     :return: A sudoku board for someone to play/solve
     """
 
-    legalValues = list(info.legal)
+    return __generate(info, Random(getrandbits(64)), None, stats, budget)
+
+def iter_regular(
+        info: RegularInfo,
+        seed: Optional[int]=None,
+        limit: Optional[int]=None,
+        stats: Optional[SolverStats]=None,
+        budget: Optional[SolverBudget]=None
+) -> Iterator[RegularSudoku]:
+    """
+    Lazily generates regular sudoku boards one at a time, so that a consumer only pays for the boards it takes. The
+    scratch lists used while filling the boards are made once and reused for every board. Each board gets its own
+    seed, drawn in turn from a generator seeded with the given seed, and is generated with a random number generator
+    of its own seeded with it. The random module is left untouched, and the same seed always produces the same boards
+    in the same order
+    :param info: Contains all the parameters needed for generating the sudoku boards
+    :param seed: The seed that the seed of every board is drawn from. A seed drawn from the random module is used if
+        None
+    :param limit: The number of sudoku boards to be generated. Boards are generated forever if None
+    :param stats: Collects statistics about every uniqueness check made while adjusting the difficulty. Nothing is
+        recorded if None
+    :param budget: Limits the work done by each uniqueness check made while adjusting the difficulty. Unlimited if
+        None
+    :return: An iterator over the generated sudoku boards
+    :raises ValueError: If limit is negative
+    """
+
+    if limit is not None and limit < 0:
+        raise ValueError(f"limit must not be negative: {limit}")
+
     length = info.length
+    seeds = Random(getrandbits(64) if seed is None else seed)
+    valueOrders = [list(range(length)) for _ in range(length * length)]
+    count = 0
 
-    table = __make_cells(length)
-    safety = _RegularSafety(length)
+    while limit is None or count < limit:
+        puzzle = __generate(info, Random(seeds.getrandbits(64)), valueOrders, stats, budget)
 
-    puzzle = RegularSudoku(info, table, safety)
+        count += 1
+
+        yield puzzle
+
+def _generate_encoded(info: RegularInfo, seed: int, budget: Optional[SolverBudget]) -> Tuple[int, float, bytes]:
+    """
+    Generates a regular sudoku from the given seed and encodes it compactly. Runs inside a worker thread or process,
+    with a random number generator of its own. Shall only be called from within the sudoku package
+    :param info: Contains all the parameters needed for generating the sudoku board
+    :param seed: The seed of the random number generator used while generating the sudoku board
+    :param budget: Limits the work done by each uniqueness check. Unlimited if None
+    :return: A tuple containing the process id of the worker, the number of seconds spent generating and the value
+        index of every cell plus one in row-major order, where 0 marks an empty cell
+    """
+
+    start = perf_counter()
+
+    puzzle = __generate(info, Random(seed), None, None, budget)
+    cells = bytes(valueIndex + 1 for valueIndex in puzzle._grid())
 
-    _initialize_values(puzzle, legalValues)
-    _adjust_for_difficulty_regular(puzzle)
-    _shuffle_board_regular(puzzle)
+    return (getpid(), perf_counter() - start, cells)
+
+def _regular_from_cells(info: RegularInfo, cells: bytes) -> RegularSudoku:
+    """
+    Rebuilds a finished sudoku board from its compact encoding. Shall only be called from within the sudoku package
+    :param info: The info that the sudoku board was generated with
+    :param cells: The value index of every cell plus one in row-major order, where 0 marks an empty cell
+    :return: The finished sudoku board
+    """
+
+    length = info.length
+    legalValues = info.legal
+    puzzle = RegularSudoku(info, __make_cells(length), _RegularSafety(length))
+
+    for (index, value) in enumerate(cells):
+        if 0 != value:
+            (rowIndex, colIndex) = divmod(index, length)
+
+            puzzle.set(rowIndex, colIndex, legalValues[value - 1])
 
     puzzle._finalize()
 
     return puzzle
+
+def generate_regular_many(
+        info: RegularInfo,
+        count: int,
+        workers: Optional[int]=None,
+        seed: Optional[int]=None,
+        budget: Optional[SolverBudget]=None,
+        throughput: Optional[GenerationThroughput]=None
+) -> Iterator[RegularSudoku]:
+    """
+    Generates many regular sudoku boards across a pool of worker processes and yields each one as soon as it is
+    finished. Every board gets its own seed, drawn in turn from a generator seeded with the given seed, and the
+    worker seeds a random number generator of its own with it before generating. The same seed therefore always produces
+    the same boards, although they may be yielded in a different order
+    :param info: Contains all the parameters needed for generating the sudoku boards
+    :param count: The number of sudoku boards to be generated
+    :param workers: The number of worker processes. The number of processors on the machine is used if None
+    :param seed: The seed that the seed of every board is drawn from. A random seed is used if None
+    :param budget: Limits the work done by each uniqueness check made while adjusting the difficulty. Unlimited if
+        None
+    :param throughput: Collects the number of boards generated and the time spent by each worker. Nothing is
+        recorded if None
+    :return: An iterator over the generated sudoku boards, in the order that they are finished
+    :raises ValueError: If count is negative
+    """
+
+    if count < 0:
+        raise ValueError(f"count must not be negative: {count}")
+
+    seeds = Random(seed)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        limit = 2 * (workers or cpu_count() or 1)
+        pending: Set[Future] = set()
+        submitted = 0
+
+        try:
+            while True:
+                while submitted < count and len(pending) < limit:
+                    pending.add(executor.submit(_generate_encoded, info, seeds.getrandbits(64), budget))
+                    submitted += 1
+
+                if 0 == len(pending):
+                    return
+
+                (done, pending) = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    (worker, seconds, cells) = future.result()
+
+                    if throughput is not None:
+                        throughput._record(worker, seconds)
+
+                    yield _regular_from_cells(info, cells)
+        finally:
+            for future in pending:
+                future.cancel()
+
+def regular_isomorphs(puzzle: RegularSudoku, count: int) -> Iterator[RegularSudoku]:
+    """
+    Makes random boards that are equivalent to the given one, without adjusting the difficulty again. Each board has
+    its values relabeled and its rows, columns, rows of boxes and columns of boxes reordered, which keeps it valid
+    and keeps it at exactly one solution. Every value on the given board becomes a given of the new boards
+    :param puzzle: The sudoku board to be transformed, normally one that was just generated
+    :param count: The number of sudoku boards to be made
+    :return: An iterator over the equivalent sudoku boards
+    :raises ValueError: If count is negative
+    """
+
+    if count < 0:
+        raise ValueError(f"count must not be negative: {count}")
+
+    info = puzzle._info
+    cells = bytes(valueIndex + 1 for valueIndex in puzzle._grid())
+    generator = Random(getrandbits(64))
+
+    for _ in range(count):
+        isomorph = _random_isomorph(cells, puzzle.length, puzzle.box_rows, puzzle.box_cols, generator)
+
+        yield _regular_from_cells(info, isomorph)
+
+def generate_regular_isomorphs(
+        info: RegularInfo,
+        count: int,
+        stats: Optional[SolverStats]=None,
+        budget: Optional[SolverBudget]=None
+) -> Iterator[RegularSudoku]:
+    """
+    Generates one regular sudoku and derives the given number of equivalent boards from it. Only the first board pays
+    for the difficulty adjustment, so this is far faster than generating every board. The boards share their
+    structure, which suits difficulty levels where players will not notice it
+    :param info: Contains all the parameters needed for generating the sudoku boards
+    :param count: The number of sudoku boards to be made
+    :param stats: Collects statistics about every uniqueness check made while adjusting the difficulty. Nothing is
+        recorded if None
+    :param budget: Limits the work done by each uniqueness check made while adjusting the difficulty. Unlimited if
+        None
+    :return: An iterator over the sudoku boards
+    :raises ValueError: If count is negative
+    """
+
+    if count < 0:
+        raise ValueError(f"count must not be negative: {count}")
+
+    if 0 != count:
+        yield from regular_isomorphs(generate_regular(info, stats, budget), count)
+
+def generate_regular_ladder(
+        dimension: RegularDimension,
+        stats: Optional[SolverStats]=None,
+        budget: Optional[SolverBudget]=None
+) -> Dict[RegularDifficulty, RegularSudoku]:
+    """
+    Generates a regular sudoku for every difficulty level from a single solved board. Givens keep being removed from
+    the board, from the easiest difficulty to the hardest, and a copy of it is taken once each difficulty's amount of
+    givens is reached. Every level carries on from the cell where the level before it stopped, and reuses the
+    removals already checked. Each copy is shuffled and relabeled on its own, so the boards do not look alike. The
+    last levels thin an already sparse board, where a few uniqueness checks can take far longer than all of the
+    others, so every check is bounded. The whole ladder then costs less than generating a board for every level
+    separately
+    :param dimension: The dimensions shared by every sudoku board
+    :param stats: Collects statistics about every uniqueness check made while adjusting the difficulty. Nothing is
+        recorded if None
+    :param budget: Limits the work done by each uniqueness check made while adjusting the difficulty. A given whose
+        removal cannot be checked within the budget is kept. A budget of five search nodes per cell of the board is
+        used if None
+    :return: A dictionary from every difficulty level to its sudoku board
+    """
+
+    generator = Random(getrandbits(64))
+    puzzle = _initialized_regular(RegularInfo(dimension, RegularDifficulty.BEGINNER), generator)
+    ladder = {}
+
+    if budget is None:
+        budget = SolverBudget(max_nodes=__LADDER_NODES_PER_CELL * puzzle.length * puzzle.length)
+
+    for difficulty in _adjust_for_difficulty_ladder_regular(puzzle, dimension, generator, stats, budget):
+        cells = bytes(valueIndex + 1 for valueIndex in puzzle._grid())
+        isomorph = _random_isomorph(cells, puzzle.length, puzzle.box_rows, puzzle.box_cols, generator)
+
+        ladder[difficulty] = _regular_from_cells(RegularInfo(dimension, difficulty), isomorph)
+
+    return ladder
@@ -0,0 +1,85 @@
+from typing import Dict
+from final_class import final
+
+@final
+class GenerationThroughput:
+    """
+    Collects how many puzzles each worker process generated and how long it spent generating them. Pass the same
+    collector to several calls to accumulate their numbers
+    """
+
+    def __init__(self):
+        """
+        Makes a collector with no workers recorded
+        """
+
+        self.__counts: Dict[int, int] = {}
+        """
+        The number of puzzles generated by each worker, keyed by the worker's process id
+        """
+
+        self.__seconds: Dict[int, float] = {}
+        """
+        The number of seconds each worker spent generating puzzles, keyed by the worker's process id
+        """
+
+    @property
+    def counts(self) -> Dict[int, int]:
+        """
+        Returns the number of puzzles generated by each worker
+        :return: A dictionary from the process id of each worker to the number of puzzles it generated
+        """
+
+        return dict(self.__counts)
+
+    @property
+    def seconds(self) -> Dict[int, float]:
+        """
+        Returns the number of seconds each worker spent generating puzzles
+        :return: A dictionary from the process id of each worker to the number of seconds it spent generating
+        """
+
+        return dict(self.__seconds)
+
+    @property
+    def rates(self) -> Dict[int, float]:
+        """
+        Returns the number of puzzles each worker generated per second spent generating
+        :return: A dictionary from the process id of each worker to its puzzles per second
+        """
+
+        return {
+            worker: 0.0 if 0 == self.__seconds[worker] else count / self.__seconds[worker]
+            for (worker, count) in self.__counts.items()
+        }
+
+    def _record(self, worker: int, seconds: float):
+        """
+        Records one puzzle generated by the given worker. Shall only be called from within the sudoku package
+        :param worker: The process id of the worker
+        :param seconds: The number of seconds the worker spent generating the puzzle
+        """
+
+        self.__counts[worker] = self.__counts.get(worker, 0) + 1
+        self.__seconds[worker] = self.__seconds.get(worker, 0.0) + seconds
+
+    def __str__(self):
+        """
+        Makes a string representation of the throughput of every worker
+        :return: A string representation of the throughput of every worker
+        """
+
+        result = "Generation Throughput:\n"
+
+        for (worker, rate) in self.rates.items():
+            result += f"\t{worker}: {self.__counts[worker]} puzzles in {self.__seconds[worker]:.2f}s ({rate:.2f}/s)\n"
+
+        return result
+
+    def __repr__(self):
+        """
+        Returns the same result as __str__
+        :return: The same result as __str__
+        """
+
+        return str(self)
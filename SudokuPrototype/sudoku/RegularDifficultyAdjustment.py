@@ -1,20 +1,24 @@
-from random import randint
+from random import Random
+from typing import List, Tuple, Set, Iterator, Optional
+from sudoku.SolverStats import SolverStats
+from sudoku.SolverBudget import SolverBudget
 from sudoku.StateError import StateError
-from sudoku.RegularSudoku import RegularSudoku
-from sudoku.RegularSolver import _has_unique_solution
+from sudoku.RegularSudoku import RegularDimension, RegularDifficulty, RegularInfo, RegularSudoku
+from sudoku.RegularSolverSession import _RegularSolverSession
+from sudoku.RegularSolver import _remembered_uniqueness, _remember_uniqueness
 
-def __decide_amount_of_givens(puzzle: RegularSudoku) -> int:
-    total = puzzle.length * puzzle.length
-    upperBound = puzzle.initial_upper_bound_of_givens
-    lowerBound = puzzle.initial_lower_bound_of_givens
+def __decide_amount_of_givens(length: int, info: RegularInfo, generator: Random) -> int:
+    total = length * length
+    upperBound = info.initial_upper_bound_of_givens
+    lowerBound = info.initial_lower_bound_of_givens
 
-    percent = randint(lowerBound, upperBound)
+    percent = generator.randint(lowerBound, upperBound)
     amount = round(total * (percent / 100))
 
     return amount
 
-def __decide_lower_bound_on_unit(puzzle: RegularSudoku) -> int:
-    return round(puzzle.length * (puzzle.initial_lower_bound_of_givens_per_unit / 100))
+def __decide_lower_bound_on_unit(length: int, info: RegularInfo) -> int:
+    return round(length * (info.initial_lower_bound_of_givens_per_unit / 100))
 
 def __check_lower_bound(puzzle: RegularSudoku, rowIndex: int, colIndex: int, lowerBoundOfGivensOnUnit: int) -> bool:
     (rowGivenCount, colGivenCount, boxGivenCount) = puzzle._givens(rowIndex, colIndex)
@@ -25,54 +29,171 @@ def __check_lower_bound(puzzle: RegularSudoku, rowIndex: int, colIndex: int, low
 
     return rowResult and colResult and boxResult
 
-def __try_remove(puzzle: RegularSudoku, rowIndex: int, colIndex: int, valueCount: int) -> int:
-    value = puzzle.get(rowIndex, colIndex)
-
-    puzzle.delete(rowIndex, colIndex)
-
-    if _has_unique_solution(puzzle):
-        return valueCount - 1
-    else:
+def __is_unique(
+        puzzle: RegularSudoku,
+        session: _RegularSolverSession,
+        removed: List[Tuple[int, int, str]],
+        stats: Optional[SolverStats],
+        budget: Optional[SolverBudget]
+) -> bool:
+    unique = _remembered_uniqueness(puzzle)
+
+    if unique is None:
+        if 1 == len(removed):
+            (rowIndex, colIndex, _) = removed[0]
+            alternate = session.has_alternate_solution(rowIndex, colIndex, stats, budget)
+            unique = None if alternate is None else not alternate
+        else:
+            unique = session.has_unique_solution(stats, budget)
+
+        if unique is not None:
+            _remember_uniqueness(puzzle, unique)
+
+    return bool(unique)
+
+def __try_remove_batch(
+        puzzle: RegularSudoku,
+        session: _RegularSolverSession,
+        batch: List[Tuple[int, int]],
+        limit: int,
+        lowerBoundOfGivensOnUnit: int,
+        kept: Set[Tuple[int, int]],
+        stats: Optional[SolverStats],
+        budget: Optional[SolverBudget]
+) -> Tuple[int, bool]:
+    removed = []
+
+    for (rowIndex, colIndex) in batch:
+        if len(removed) == limit:
+            break
+
+        value = puzzle.get(rowIndex, colIndex)
+
+        if value is not None and (rowIndex, colIndex) not in kept and __check_lower_bound(puzzle, rowIndex, colIndex, lowerBoundOfGivensOnUnit):
+            puzzle.delete(rowIndex, colIndex)
+            session.remove(rowIndex, colIndex)
+            removed.append((rowIndex, colIndex, value))
+
+    if 0 == len(removed) or __is_unique(puzzle, session, removed, stats, budget):
+        return (len(removed), False)
+
+    for (rowIndex, colIndex, value) in reversed(removed):
         puzzle.set(rowIndex, colIndex, value)
-
-        return valueCount
-
-
-def __do_adjustment(puzzle: RegularSudoku, amountOfGivens: int, lowerBoundOfGivensOnUnit: int):
-    length = puzzle.length
-    valueCount = length * length
-
-    for rowIndex1 in range(length):
-        for colIndex1 in range(length):
-            if __check_lower_bound(puzzle, rowIndex1, colIndex1, lowerBoundOfGivensOnUnit):
-                rowIndex2 = length - rowIndex1 - 1
-                colIndex2 = length - colIndex1 - 1
-
-                if 0 == randint(0, 2):
-                    valueCount = __try_remove(puzzle, rowIndex1, colIndex1, valueCount)
-
-                    if valueCount <= amountOfGivens:
-                        return
-
-                    valueCount = __try_remove(puzzle, rowIndex2, colIndex2, valueCount)
-                else:
-                    valueCount = __try_remove(puzzle, rowIndex2, colIndex2, valueCount)
-
-                    if valueCount <= amountOfGivens:
-                        return
-
-                    valueCount = __try_remove(puzzle, rowIndex1, colIndex1, valueCount)
-
-                if valueCount <= amountOfGivens:
-                    return
-
-def _adjust_for_difficulty_regular(puzzle: RegularSudoku):
-    amountOfGivens = __decide_amount_of_givens(puzzle)
-    lowerBoundOfGivensOnUnit = __decide_lower_bound_on_unit(puzzle)
-
-    __do_adjustment(puzzle, amountOfGivens, lowerBoundOfGivensOnUnit)
-
+        session.restore(rowIndex, colIndex, value)
+
+    if 1 == len(removed):
+        kept.add((removed[0][0], removed[0][1]))
+
+        return (0, True)
+
+    cells = [(rowIndex, colIndex) for (rowIndex, colIndex, _) in removed]
+    middle = len(cells) // 2
+
+    (count, _) = __try_remove_batch(
+        puzzle, session, cells[:middle], limit, lowerBoundOfGivensOnUnit, kept, stats, budget
+    )
+    (otherCount, _) = __try_remove_batch(
+        puzzle, session, cells[middle:], limit - count, lowerBoundOfGivensOnUnit, kept, stats, budget
+    )
+
+    return (count + otherCount, True)
+
+def __removal_order(length: int, generator: Random) -> List[Tuple[int, int]]:
+    cells = []
+
+    for index in range(length * length):
+        (rowIndex, colIndex) = divmod(index, length)
+        mirror = (length - rowIndex - 1, length - colIndex - 1)
+
+        if 0 == generator.randint(0, 2):
+            cells.append((rowIndex, colIndex))
+            cells.append(mirror)
+        else:
+            cells.append(mirror)
+            cells.append((rowIndex, colIndex))
+
+    return list(dict.fromkeys(cells))
+
+def __do_adjustment(
+        puzzle: RegularSudoku,
+        session: _RegularSolverSession,
+        cells: List[Tuple[int, int]],
+        index: int,
+        batchSize: int,
+        valueCount: int,
+        amountOfGivens: int,
+        lowerBoundOfGivensOnUnit: int,
+        kept: Set[Tuple[int, int]],
+        stats: Optional[SolverStats],
+        budget: Optional[SolverBudget]
+) -> Tuple[int, int, int]:
+    scanned = 0
+
+    while scanned < len(cells) and valueCount > amountOfGivens:
+        batch = cells[index:index + min(batchSize, len(cells) - scanned)]
+        index = (index + len(batch)) % len(cells)
+        scanned += len(batch)
+
+        (count, failed) = __try_remove_batch(
+            puzzle, session, batch, valueCount - amountOfGivens, lowerBoundOfGivensOnUnit, kept, stats, budget
+        )
+        valueCount -= count
+
+        if failed:
+            batchSize = 1
+        elif 1 != batchSize:
+            batchSize = min(8, batchSize * 2)
+
+    return (valueCount, index, batchSize)
+
+def __check_adjusted(puzzle: RegularSudoku):
     if not puzzle.is_valid():
         raise StateError(f"Sudoku board must still be valid by this point\n{puzzle}")
     if puzzle.is_complete():
         raise StateError(f"Sudoku board must not be complete by this point\n{puzzle}")
+
+def _adjust_for_difficulty_regular(
+        puzzle: RegularSudoku,
+        generator: Random,
+        stats: Optional[SolverStats]=None,
+        budget: Optional[SolverBudget]=None
+):
+    length = puzzle.length
+    info = puzzle._info
+    amountOfGivens = __decide_amount_of_givens(length, info, generator)
+    lowerBoundOfGivensOnUnit = __decide_lower_bound_on_unit(length, info)
+    cells = __removal_order(length, generator)
+    session = _RegularSolverSession(puzzle, None, cells)
+
+    __do_adjustment(
+        puzzle, session, cells, 0, 4, length * length, amountOfGivens, lowerBoundOfGivensOnUnit, set(), stats, budget
+    )
+    __check_adjusted(puzzle)
+
+def _adjust_for_difficulty_ladder_regular(
+        puzzle: RegularSudoku,
+        dimension: RegularDimension,
+        generator: Random,
+        stats: Optional[SolverStats]=None,
+        budget: Optional[SolverBudget]=None
+) -> Iterator[RegularDifficulty]:
+    length = puzzle.length
+    cells = __removal_order(length, generator)
+    session = _RegularSolverSession(puzzle, None, cells)
+    valueCount = length * length
+    index = 0
+    batchSize = 4
+    kept = set()
+
+    for difficulty in RegularDifficulty:
+        info = RegularInfo(dimension, difficulty)
+        amountOfGivens = __decide_amount_of_givens(length, info, generator)
+        lowerBoundOfGivensOnUnit = __decide_lower_bound_on_unit(length, info)
+
+        (valueCount, index, batchSize) = __do_adjustment(
+            puzzle, session, cells, index, batchSize, valueCount, amountOfGivens, lowerBoundOfGivensOnUnit, kept,
+            stats, budget
+        )
+        __check_adjusted(puzzle)
+
+        yield difficulty
@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import json
+from os import replace
+from os.path import exists
+from random import Random
+from threading import Condition
+from collections import deque
+from typing import Dict, Tuple, Deque, Optional
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor, BrokenExecutor
+from final_class import final
+from sudoku.StateError import StateError
+from sudoku.SolverBudget import SolverBudget
+from sudoku.RegularSudoku import RegularDimension, RegularDifficulty, RegularInfo, RegularSudoku
+from sudoku.Generation import _generate_encoded, _regular_from_cells
+
+_Kind = Tuple[RegularDimension, RegularDifficulty]
+"""
+The dimensions and difficulty of the boards held in one stock of a pool
+"""
+
+@final
+class RegularPuzzlePool:
+    """
+    Keeps a stock of finished regular sudoku boards for each combination of dimensions and difficulty, so that a
+    board can be handed out without waiting for it to be generated. Each board taken out is replaced in the
+    background by worker threads or processes. The stock can be saved to a file and is loaded back from it when a
+    new pool is made
+    """
+
+    __RETRIES: int = 3
+    """
+    The number of times a failed generation is started again before the failure is reported. Shall only be accessed
+    from within the RegularPuzzlePool class
+    """
+
+    def __init__(
+            self,
+            stock: Dict[_Kind, int],
+            path: Optional[str]=None,
+            workers: int=1,
+            processes: bool=True,
+            seed: Optional[int]=None,
+            budget: Optional[SolverBudget]=None
+    ):
+        """
+        Makes a pool and starts filling every stock up to its target in the background. Boards saved in the file at
+        the given path are loaded first
+        :param stock: The number of boards to keep for each combination of dimensions and difficulty
+        :param path: The file that the stock is saved to and loaded from. Nothing is saved or loaded if None
+        :param workers: The number of boards generated at once
+        :param processes: Whether boards are generated in worker processes rather than worker threads. Threads share
+            the interpreter with the caller, so processes keep generation from slowing down the caller
+        :param seed: The seed that the seed of every board is drawn from. Each board is generated with a random number
+            generator of its own, seeded with its seed. A random seed is used if None
+        :param budget: Limits the work done by each uniqueness check made while generating. Every check is charged
+            separately, so the budget is shared safely by the workers. Unlimited if None
+        :raises ValueError: If a target stock is negative or workers is less than 1
+        """
+
+        for (kind, target) in stock.items():
+            if target < 0:
+                raise ValueError(f"Stock must not be negative: [{kind[0].name}, {kind[1].name}: {target}]")
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1: {workers}")
+
+        self.__targets: Dict[_Kind, int] = dict(stock)
+        """
+        The number of boards to keep for each combination of dimensions and difficulty
+        """
+
+        self.__boards: Dict[_Kind, Deque[bytes]] = {kind: deque() for kind in stock}
+        """
+        The compact encoding of every board in stock, oldest first, for each combination of dimensions and
+        difficulty
+        """
+
+        self.__pending: Dict[_Kind, int] = {kind: 0 for kind in stock}
+        """
+        The number of boards being generated for each combination of dimensions and difficulty
+        """
+
+        self.__path: Optional[str] = path
+        """
+        The file that the stock is saved to and loaded from. None if the stock is not saved
+        """
+
+        self.__workers: int = workers
+        """
+        The number of boards generated at once
+        """
+
+        self.__processes: bool = processes
+        """
+        Indicates whether boards are generated in worker processes rather than worker threads
+        """
+
+        self.__errors: Dict[_Kind, BaseException] = {}
+        """
+        The failure that stopped the generation of boards for each combination of dimensions and difficulty, kept
+        until it is reported by pop
+        """
+
+        self.__seeds: Random = Random(seed)
+        """
+        Draws the seed of every board to be generated
+        """
+
+        self.__budget: Optional[SolverBudget] = budget
+        """
+        Limits the work done by each uniqueness check made while generating. Unlimited if None
+        """
+
+        self.__condition: Condition = Condition()
+        """
+        Guards the stock and wakes up callers waiting for a board
+        """
+
+        self.__closed: bool = False
+        """
+        Indicates whether the pool has been closed
+        """
+
+        self.__executor: Executor = self.__new_executor()
+        """
+        Runs the generation of new boards
+        """
+
+        if path is not None and exists(path):
+            self.__load()
+
+        with self.__condition:
+            self.__top_up()
+
+    def __new_executor(self) -> Executor:
+        """
+        Makes a new pool of workers for generating boards. Shall only be called from within the RegularPuzzlePool
+        class
+        :return: The new pool of workers
+        """
+
+        if self.__processes:
+            return ProcessPoolExecutor(self.__workers)
+        else:
+            return ThreadPoolExecutor(self.__workers)
+
+    def __replace_executor(self, executor: Executor):
+        """
+        Swaps the given pool of workers for a new one if it is still in use. A pool of worker processes breaks for
+        good once one of its processes dies. The caller shall hold the condition. Shall only be called from within
+        the RegularPuzzlePool class
+        :param executor: The pool of workers that broke
+        """
+
+        if executor is self.__executor:
+            self.__executor = self.__new_executor()
+            executor.shutdown(wait=False)
+
+    def __load(self):
+        """
+        Adds the boards saved in the pool's file to the stock, up to each target. Shall only be called from within
+        the RegularPuzzlePool class
+        """
+
+        with open(self.__path, "r") as file:
+            saved = json.load(file)
+
+        for (kind, boards) in self.__boards.items():
+            for cells in saved.get(RegularPuzzlePool.__name(kind), []):
+                if len(boards) < self.__targets[kind]:
+                    boards.append(bytes.fromhex(cells))
+
+    @staticmethod
+    def __name(kind: _Kind) -> str:
+        """
+        Returns the name that the stock of the given combination is saved under. Shall only be called from within the
+        RegularPuzzlePool class
+        :param kind: The combination of dimensions and difficulty
+        :return: The name that the stock is saved under
+        """
+
+        return f"{kind[0].name}:{kind[1].name}"
+
+    def __top_up(self):
+        """
+        Starts generating boards for every stock that is below its target, as long as fewer boards than the number of
+        workers are being generated. The stock with the largest shortfall is served first. Stocks whose failure has not
+        been reported yet are skipped. The caller shall hold the condition. Shall only be called from within the
+        RegularPuzzlePool class
+        """
+
+        while not self.__closed and sum(self.__pending.values()) < self.__workers:
+            kinds = [kind for kind in self.__targets if kind not in self.__errors]
+            kind = max(kinds, key=self.__shortfall, default=None)
+
+            if kind is None or self.__shortfall(kind) <= 0:
+                return
+
+            self.__submit(kind, 0)
+
+    def __submit(self, kind: _Kind, attempt: int):
+        """
+        Starts generating a board for the given stock. The caller shall hold the condition. Shall only be called from
+        within the RegularPuzzlePool class
+        :param kind: The combination of dimensions and difficulty of the board
+        :param attempt: The number of times the generation of this board has already failed
+        """
+
+        info = RegularInfo(*kind)
+        seed = self.__seeds.getrandbits(64)
+        executor = self.__executor
+
+        try:
+            future = executor.submit(_generate_encoded, info, seed, self.__budget)
+        except BrokenExecutor:
+            self.__replace_executor(executor)
+
+            executor = self.__executor
+            future = executor.submit(_generate_encoded, info, seed, self.__budget)
+
+        self.__pending[kind] += 1
+        future.add_done_callback(
+            lambda done, kind=kind, attempt=attempt, executor=executor: self.__finished(kind, attempt, executor, done)
+        )
+
+    def __shortfall(self, kind: _Kind) -> int:
+        """
+        Returns the number of boards that the given stock is short of its target, counting boards being generated.
+        Shall only be called from within the RegularPuzzlePool class
+        :param kind: The combination of dimensions and difficulty of the stock
+        :return: The number of boards the stock is short of its target
+        """
+
+        return self.__targets[kind] - len(self.__boards[kind]) - self.__pending[kind]
+
+    def __finished(self, kind: _Kind, attempt: int, executor: Executor, future: Future):
+        """
+        Adds a newly generated board to its stock and starts generating the next one. A failed generation is started
+        again, on a new pool of workers if the old one broke, until it has failed too many times. The failure is then
+        kept to be reported by pop. Cancelled generations are dropped. Shall only be called from within the
+        RegularPuzzlePool class
+        :param kind: The combination of dimensions and difficulty of the board
+        :param attempt: The number of times the generation of this board had already failed
+        :param executor: The pool of workers that ran the generation
+        :param future: The finished generation
+        """
+
+        with self.__condition:
+            self.__pending[kind] -= 1
+
+            if self.__closed or future.cancelled():
+                return
+
+            error = future.exception()
+
+            if isinstance(error, BrokenExecutor):
+                self.__replace_executor(executor)
+
+            if error is None:
+                (_, _, cells) = future.result()
+
+                self.__boards[kind].append(cells)
+            elif attempt < RegularPuzzlePool.__RETRIES:
+                self.__submit(kind, attempt + 1)
+            else:
+                self.__errors[kind] = error
+
+            self.__condition.notify_all()
+            self.__top_up()
+
+    def available(self, dimension: RegularDimension, difficulty: RegularDifficulty) -> int:
+        """
+        Returns the number of boards in stock for the given dimensions and difficulty
+        :param dimension: The dimensions of the boards
+        :param difficulty: The difficulty of the boards
+        :return: The number of boards in stock
+        :raises KeyError: If the pool keeps no stock for the given dimensions and difficulty
+        """
+
+        with self.__condition:
+            return len(self.__boards[(dimension, difficulty)])
+
+    def pop(
+            self,
+            dimension: RegularDimension,
+            difficulty: RegularDifficulty,
+            timeout: Optional[float]=0
+    ) -> Optional[RegularSudoku]:
+        """
+        Takes the oldest board in stock for the given dimensions and difficulty and starts generating its
+        replacement
+        :param dimension: The dimensions of the board
+        :param difficulty: The difficulty of the board
+        :param timeout: The number of seconds to wait for a board if the stock is empty. Waits until a board is ready
+            if None
+        :return: A finished sudoku board or None if none was ready in time
+        :raises KeyError: If the pool keeps no stock for the given dimensions and difficulty
+        :raises StateError: If the pool has been closed, or if the stock is empty and generating a board for it kept
+            failing. Generation of the stock is started again once the failure has been reported
+        """
+
+        kind = (dimension, difficulty)
+
+        with self.__condition:
+            boards = self.__boards[kind]
+
+            if self.__closed:
+                raise StateError("The puzzle pool has been closed")
+
+            if 0 == len(boards) and 0 != timeout:
+                self.__condition.wait_for(lambda: 0 != len(boards) or kind in self.__errors or self.__closed, timeout)
+
+            if 0 == len(boards):
+                error = self.__errors.pop(kind, None)
+
+                if error is None:
+                    return None
+
+                self.__top_up()
+
+                raise StateError(f"Generating a board failed: [{kind[0].name}, {kind[1].name}]") from error
+
+            cells = boards.popleft()
+
+            self.__top_up()
+
+        return _regular_from_cells(RegularInfo(dimension, difficulty), cells)
+
+    def save(self):
+        """
+        Writes every board in stock to the pool's file. The file is replaced in one step, so a crash while saving
+        leaves the previous file intact. Does nothing if the pool has no file
+        """
+
+        if self.__path is None:
+            return
+
+        with self.__condition:
+            saved = {
+                RegularPuzzlePool.__name(kind): [cells.hex() for cells in boards]
+                for (kind, boards) in self.__boards.items()
+            }
+
+        temporary = f"{self.__path}.tmp"
+
+        with open(temporary, "w") as file:
+            json.dump(saved, file)
+
+        replace(temporary, self.__path)
+
+    def close(self):
+        """
+        Stops generating boards and saves the stock. Boards still being generated are discarded. Does nothing if the
+        pool has already been closed
+        """
+
+        with self.__condition:
+            if self.__closed:
+                return
+
+            self.__closed = True
+            self.__condition.notify_all()
+
+        self.__executor.shutdown(wait=True, cancel_futures=True)
+        self.save()
+
+    def __enter__(self) -> RegularPuzzlePool:
+        """
+        Returns this pool for use in a with statement
+        :return: This pool
+        """
+
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        """
+        Closes this pool at the end of a with statement
+        """
+
+        self.close()
@@ -1,209 +1,314 @@
-from typing import List, Any
-from sudoku.ExactCoverNode import _ExactCoverNode
+from time import perf_counter
+from threading import Lock
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional, Iterator
+from sudoku.BitboardSolver import _bitboard_solutions
+from sudoku.ExactCoverMatrix import _ExactCoverMatrix
+from sudoku.SolverStats import SolverStats
+from sudoku.SolverBudget import SolverBudget, _BudgetCounter, _BudgetExhausted
 from sudoku.StateError import StateError
-from sudoku.RegularSudoku import RegularSudoku
+from sudoku.RegularSudoku import RegularSolverEngine, RegularSudoku
 
-def __index(rowIndex: int, colIndex: int, valueIndex: int, length: int) -> int:
-    return rowIndex * length * length + colIndex * length + valueIndex
-
-def __check_cell_constraint(hBase: int, matrix: List[List[bool]], length: int) -> int:
-    for rowIndex in range(length):
-        for colIndex in range(length):
-            for valueIndex in range(length):
-                index = __index(rowIndex, colIndex, valueIndex, length)
-                matrix[index][hBase] = True
-
-            hBase += 1
+__templates: Dict[Tuple[int, int, int], Tuple[List[Tuple[int, int, int, int]], _ExactCoverMatrix]] = {}
 
-    return hBase
+__MEMO_SIZE = 65536
 
-def __check_row_constraint(hBase: int, matrix: List[List[bool]], length: int) -> int:
-    for rowIndex in range(length):
-        for valueIndex in range(length):
-            for colIndex in range(length):
-                index = __index(rowIndex, colIndex, valueIndex, length)
-                matrix[index][hBase] = True
-
-            hBase += 1
-
-    return hBase
+__uniqueness: OrderedDict[Tuple[int, int], bool] = OrderedDict()
+"""
+Least recently used memo of uniqueness results, keyed on the length and hash of each board. It lives in the memory of
+the current process only, so it starts empty in every new process and worker process. Shall only be accessed from
+within the RegularSolver.py file
+"""
 
-def __check_col_constraint(hBase: int, matrix: List[List[bool]], length: int) -> int:
-    for colIndex in range(length):
-        for valueIndex in range(length):
-            for rowIndex in range(length):
-                index = __index(rowIndex, colIndex, valueIndex, length)
-                matrix[index][hBase] = True
+__uniquenessLock = Lock()
 
-            hBase += 1
-
-    return hBase
+def _index(rowIndex: int, colIndex: int, valueIndex: int, length: int) -> int:
+    return rowIndex * length * length + colIndex * length + valueIndex
 
-def __traverse_box(
-        hBase: int,
-        matrix: List[List[bool]],
+def __row_columns(
         rowIndex: int,
         colIndex: int,
         valueIndex: int,
         length: int,
         boxRows: int,
         boxCols: int
-):
-    for rowDelta in range(boxRows):
-        for colDelta in range(boxCols):
-            index = __index(rowIndex + rowDelta, colIndex + colDelta, valueIndex, length)
-            matrix[index][hBase] = True
-
-def __check_box_constraint(hBase: int, matrix: List[List[bool]], length: int, boxRows: int, boxCols: int):
-    for rowIndex in range(0, length, boxRows):
-        for colIndex in range(0, length, boxCols):
-            for valueIndex in range(length):
-                __traverse_box(hBase, matrix, rowIndex, colIndex, valueIndex, length, boxRows, boxCols)
+) -> Tuple[int, int, int, int]:
+    area = length * length
+    boxIndex = rowIndex // boxRows * (length // boxCols) + colIndex // boxCols
 
-                hBase += 1
+    cellCol = rowIndex * length + colIndex
+    rowCol = area + rowIndex * length + valueIndex
+    colCol = 2 * area + colIndex * length + valueIndex
+    boxCol = 3 * area + boxIndex * length + valueIndex
 
-def __initialize_matrix(length: int) -> List[List[bool]]:
-    matrix = []
-    rowCount = length * length * length
-    colCount = 4 * length * length
+    return (cellCol, rowCol, colCol, boxCol)
 
-    for _ in range(rowCount):
-        matrix.append([False] * colCount)
+def __make_template(length: int, boxRows: int, boxCols: int) -> Tuple[List[Tuple[int, int, int, int]], _ExactCoverMatrix]:
+    rows = []
 
-    return matrix
+    for rowIndex in range(length):
+        for colIndex in range(length):
+            for valueIndex in range(length):
+                rows.append(__row_columns(rowIndex, colIndex, valueIndex, length, boxRows, boxCols))
 
-def __make_matrix(puzzle: RegularSudoku) -> List[List[bool]]:
-    length = puzzle.length
-    matrix = __initialize_matrix(length)
-    hBase = 0
+    return (rows, _ExactCoverMatrix(4 * length * length, rows))
 
-    hBase = __check_cell_constraint(hBase, matrix, length)
-    hBase = __check_row_constraint(hBase, matrix, length)
-    hBase = __check_col_constraint(hBase, matrix, length)
-    __check_box_constraint(hBase, matrix, length, puzzle.box_rows, puzzle.box_cols)
+def __cached_template(length: int, boxRows: int, boxCols: int) -> Tuple[List[Tuple[int, int, int, int]], _ExactCoverMatrix]:
+    key = (length, boxRows, boxCols)
+    template = __templates.get(key)
 
-    return matrix
+    if template is None:
+        template = __make_template(*key)
+        __templates[key] = template
 
-def __fill(values: List[Any], fillValue: Any):
-    for index in range(len(values)):
-        values[index] = fillValue
+    return template
 
-def __place_value(value: str, rowIndex: int, colIndex: int, length: int, matrix: List[List[bool]], legalValues: str):
-    for valueIndex in range(length):
-        if value != legalValues[valueIndex]:
-            index = __index(rowIndex, colIndex, valueIndex, length)
-            __fill(matrix[index], False)
+def _template(puzzle: RegularSudoku) -> List[Tuple[int, int, int, int]]:
+    return __cached_template(puzzle.length, puzzle.box_rows, puzzle.box_cols)[0]
 
-def __place_initial_values(puzzle: RegularSudoku, matrix: List[List[bool]]):
-    length = puzzle.length
-    legalValues = puzzle.legal
+def _new_matrix(puzzle: RegularSudoku) -> _ExactCoverMatrix:
+    return __cached_template(puzzle.length, puzzle.box_rows, puzzle.box_cols)[1].copy()
 
-    for rowIndex in range(length):
-        for colIndex in range(length):
-            value = puzzle.get(rowIndex, colIndex)
+def __ordered_matrix(
+        length: int,
+        template: List[Tuple[int, int, int, int]],
+        valueOrders: List[List[int]]
+) -> Tuple[_ExactCoverMatrix, List[int], List[int]]:
+    rowOrder = []
+    positions = [0] * len(template)
 
-            if value is not None:
-                __place_value(value, rowIndex, colIndex, length, matrix, legalValues)
+    for choice in range(length):
+        for (cellIndex, order) in enumerate(valueOrders):
+            row = cellIndex * length + order[choice]
+            positions[row] = len(rowOrder)
+            rowOrder.append(row)
 
-def __make_doubly_linked_matrix(matrix: List[List[bool]]) -> _ExactCoverNode:
-    mainHead = _ExactCoverNode()
-    headers = []
-    cols = len(matrix[0])
+    return (_ExactCoverMatrix(4 * length * length, [template[row] for row in rowOrder]), rowOrder, positions)
 
-    for _ in range(cols):
-        headNode = _ExactCoverNode()
+def _ordered_matrix(puzzle: RegularSudoku, valueOrders: List[List[int]]) -> Tuple[_ExactCoverMatrix, List[int]]:
+    template = __cached_template(puzzle.length, puzzle.box_rows, puzzle.box_cols)[0]
+    (matrix, _, positions) = __ordered_matrix(puzzle.length, template, valueOrders)
 
-        headers.append(headNode)
+    return (matrix, positions)
 
-        mainHead.hook_right(headNode)
-        mainHead = headNode
+def __given_rows(grid: List[int], length: int, template: List[Tuple[int, int, int, int]]) -> Optional[List[int]]:
+    covered = [False] * (4 * length * length)
+    givenRows = []
 
-    mainHead = mainHead.right.column
+    for (cellIndex, valueIndex) in enumerate(grid):
+        if -1 != valueIndex:
+            row = cellIndex * length + valueIndex
 
-    for row in matrix:
-        prev = None
+            for col in template[row]:
+                if covered[col]:
+                    return None
 
-        for col in range(cols):
-            if row[col]:
-                headNode = headers[col]
-                newNode = _ExactCoverNode(headNode)
+                covered[col] = True
 
-                if prev is None:
-                    prev = newNode
+            givenRows.append(row)
 
-                headNode.up.hook_down(newNode)
-                prev.hook_right(newNode)
+    return givenRows
 
-                prev = newNode
+def __dancing_links_solutions(
+        grid: List[int],
+        length: int,
+        boxRows: int,
+        boxCols: int,
+        valueOrders: Optional[List[List[int]]],
+        stats: Optional[SolverStats],
+        counter: Optional[_BudgetCounter]
+) -> Iterator[List[int]]:
+    (template, pristine) = __cached_template(length, boxRows, boxCols)
+    givenRows = __given_rows(grid, length, template)
+
+    if givenRows is None:
+        return
+
+    if valueOrders is None:
+        rowOrder = None
+        matrix = pristine.copy()
+
+        for row in givenRows:
+            matrix.select_row(row)
+    else:
+        (matrix, rowOrder, positions) = __ordered_matrix(length, template, valueOrders)
 
-                headNode.size += 1
+        for row in givenRows:
+            matrix.select_row(positions[row])
 
-    mainHead.size = cols
+    solution = grid[:]
 
-    return mainHead
+    for chosen in matrix.search(stats, counter):
+        for node in chosen:
+            row = matrix.row_index(node)
 
-def __choose_next_column(header: _ExactCoverNode) -> _ExactCoverNode:
-    minimum = None
-    nextToUse = None
-    colNode = header.right
+            if rowOrder is not None:
+                row = rowOrder[row]
 
-    while colNode is not header:
-        size = colNode.size
+            solution[row // length] = row % length
 
-        if minimum is None or size < minimum:
-            minimum = size
-            nextToUse = colNode
+        yield solution
 
-        colNode = colNode.right
+def __timed_solutions(solutions: Iterator[List[int]], stats: SolverStats) -> Iterator[List[int]]:
+    start = perf_counter()
 
-    return nextToUse
+    try:
+        for solution in solutions:
+            stats._time(perf_counter() - start)
+            start = None
 
+            yield solution
 
-def __count_solutions(count: int, header: _ExactCoverNode) -> int:
-    if header.right is header:
-        count += 1
+            start = perf_counter()
+    finally:
+        solutions.close()
+
+        if start is not None:
+            stats._time(perf_counter() - start)
+
+def _grid_solutions(
+        grid: List[int],
+        length: int,
+        boxRows: int,
+        boxCols: int,
+        engine: RegularSolverEngine,
+        valueOrders: Optional[List[List[int]]]=None,
+        stats: Optional[SolverStats]=None,
+        counter: Optional[_BudgetCounter]=None
+) -> Iterator[List[int]]:
+    if RegularSolverEngine.BITBOARD == engine:
+        solutions = _bitboard_solutions(grid, length, boxRows, boxCols, valueOrders, stats, counter)
     else:
-        colNode = __choose_next_column(header)
-        colNode.cover()
+        solutions = __dancing_links_solutions(grid, length, boxRows, boxCols, valueOrders, stats, counter)
 
-        node1 = colNode.down
+    if stats is None:
+        return solutions
+    else:
+        return __timed_solutions(solutions, stats)
 
-        while node1 is not colNode:
-            node2 = node1.right
+def _solutions(
+        puzzle: RegularSudoku,
+        engine: Optional[RegularSolverEngine]=None,
+        valueOrders: Optional[List[List[int]]]=None,
+        stats: Optional[SolverStats]=None,
+        counter: Optional[_BudgetCounter]=None
+) -> Iterator[List[int]]:
+    if engine is None:
+        engine = puzzle.engine
 
-            while node2 is not node1:
-                node2.column.cover()
+    grid = puzzle._grid()
 
-                node2 = node2.right
+    return _grid_solutions(grid, puzzle.length, puzzle.box_rows, puzzle.box_cols, engine, valueOrders, stats, counter)
 
-            count = __count_solutions(count, header)
+def _count_solutions(solutions: Iterator[List[int]], limit: int=2) -> int:
+    count = 0
 
-            if count > 1:
-                return count
+    for _ in solutions:
+        count += 1
 
-            colNode = node1.column
+        if count >= limit:
+            break
 
-            node2 = node1.left
+    solutions.close()
 
-            while node2 is not node1:
-                node2.column.uncover()
+    return count
 
-                node2 = node2.left
+def _remembered_uniqueness(puzzle: RegularSudoku) -> Optional[bool]:
+    key = (puzzle.length, puzzle._hash)
 
-            node1 = node1.down
+    with __uniquenessLock:
+        unique = __uniqueness.get(key)
 
-        colNode.uncover()
+        if unique is not None:
+            __uniqueness.move_to_end(key)
 
-    return count
+    return unique
+
+def _remember_uniqueness(puzzle: RegularSudoku, unique: bool):
+    key = (puzzle.length, puzzle._hash)
 
-def _has_unique_solution(puzzle: RegularSudoku) -> bool:
-    matrix = __make_matrix(puzzle)
-    __place_initial_values(puzzle, matrix)
-    header = __make_doubly_linked_matrix(matrix)
+    with __uniquenessLock:
+        __uniqueness[key] = unique
+        __uniqueness.move_to_end(key)
 
-    solutionCount = __count_solutions(0, header)
+        if len(__uniqueness) > __MEMO_SIZE:
+            __uniqueness.popitem(last=False)
+
+def _has_unique_solution(
+        puzzle: RegularSudoku,
+        engine: Optional[RegularSolverEngine]=None,
+        stats: Optional[SolverStats]=None,
+        budget: Optional[SolverBudget]=None
+) -> Optional[bool]:
+    unique = _remembered_uniqueness(puzzle)
+
+    if unique is not None:
+        return unique
+
+    counter = None if budget is None else budget._start()
+
+    try:
+        solutionCount = _count_solutions(_solutions(puzzle, engine, None, stats, counter))
+    except _BudgetExhausted:
+        return None
 
     if 0 == solutionCount:
         raise StateError("No solutions found")
-    else:
-        return 1 == solutionCount
+
+    unique = 1 == solutionCount
+
+    _remember_uniqueness(puzzle, unique)
+
+    return unique
+
+def __stream_solutions(
+        puzzle: RegularSudoku,
+        maxSolutions: Optional[int],
+        engine: Optional[RegularSolverEngine],
+        stats: Optional[SolverStats]
+) -> Iterator[List[List[str]]]:
+    length = puzzle.length
+    legalValues = puzzle.legal
+    solutions = _solutions(puzzle, engine, None, stats)
+    count = 0
+
+    try:
+        for solution in solutions:
+            yield [
+                [legalValues[solution[rowIndex * length + colIndex]] for colIndex in range(length)]
+                for rowIndex in range(length)
+            ]
+
+            count += 1
+
+            if maxSolutions is not None and count >= maxSolutions:
+                return
+    finally:
+        solutions.close()
+
+def solve(
+        puzzle: RegularSudoku,
+        max_solutions: Optional[int]=None,
+        engine: Optional[RegularSolverEngine]=None,
+        stats: Optional[SolverStats]=None
+) -> Iterator[List[List[str]]]:
+    """
+    Lazily searches for the solutions of the given sudoku board. Each solution is yielded as soon as it is found, so
+    the search only does as much work as the caller consumes. The board itself is left unchanged
+    :param puzzle: The sudoku board to be solved. Its current values are treated as givens
+    :param max_solutions: The number of solutions after which the search stops. The search continues until every
+        solution has been found if None
+    :param engine: The solver engine to be used. The engine of the board's dimensions is used if None
+    :param stats: Collects statistics about the search as the solutions are consumed. Nothing is recorded if None
+    :return: An iterator over the solutions of the board. Each solution is a list of rows, where each row is a list of
+        the values in that row. Yields nothing if the board is not valid
+    :raises ValueError: If max_solutions is less than 1
+    """
+
+    if max_solutions is not None and max_solutions < 1:
+        raise ValueError(f"max_solutions must be at least 1: {max_solutions}")
+
+    if not puzzle.is_valid():
+        return iter(())
+
+    return __stream_solutions(puzzle, max_solutions, engine, stats)
@@ -0,0 +1,342 @@
+from time import perf_counter
+from typing import List, Dict, Tuple, Optional
+from final_class import final
+from sudoku.ExactCoverMatrix import _ExactCoverMatrix
+from sudoku.SolverStats import SolverStats
+from sudoku.SolverBudget import SolverBudget, _BudgetExhausted
+from sudoku.StateError import StateError
+from sudoku.BitboardSolver import _bitboard_solutions
+from sudoku.RegularSudoku import RegularSolverEngine, RegularSudoku
+from sudoku.RegularSolver import _index, _template, _new_matrix, _ordered_matrix, _count_solutions
+
+@final
+class _RegularSolverSession:
+    """
+    Long-lived solver state for a single sudoku board. With the dancing links engine, every candidate row is linked
+    once, and each given of the board is applied by selecting its row. With the bitboard engine, the givens are kept
+    as a compact grid that every search starts from. Either way, givens can be removed and restored one at a time
+    without rebuilding anything. If the board is complete when the session starts, it is kept as the known solution
+    and guides the searches for alternate solutions. Shall only be used from within the sudoku package
+    """
+
+    def __init__(
+            self,
+            puzzle: RegularSudoku,
+            engine: Optional[RegularSolverEngine]=None,
+            order: Optional[List[Tuple[int, int]]]=None
+    ):
+        """
+        Sets up the solver state for the given board and selects a row for each of its givens. Givens are selected
+        in the reverse of the order they are expected to be removed in, so that the cells removed first sit on top of
+        the selection stack
+        :param puzzle: The sudoku board whose givens are to be tracked
+        :param engine: The solver engine to be used. The engine of the board's dimensions is used if None
+        :param order: The row and column indices of every cell, in the order that the givens are expected to be
+            removed in. Row-major order is used if None
+        :raises StateError: If the givens of the sudoku board conflict with each other
+        """
+
+        self.__length: int = puzzle.length
+        """
+        The number of rows and columns in the tracked sudoku board
+        """
+
+        self.__legal: str = puzzle.legal
+        """
+        The sorted string of legal values for the tracked sudoku board
+        """
+
+        self.__boxRows: int = puzzle.box_rows
+        """
+        The number of rows in each box of the tracked sudoku board
+        """
+
+        self.__boxCols: int = puzzle.box_cols
+        """
+        The number of columns in each box of the tracked sudoku board
+        """
+
+        self.__template: List[Tuple[int, int, int, int]] = _template(puzzle)
+        """
+        The constraint columns of every candidate row, shared by all boards with the same dimensions
+        """
+
+        if engine is None:
+            engine = puzzle.engine
+
+        grid = puzzle._grid()
+
+        self.__solution: Optional[List[int]] = None if -1 in grid else grid
+        """
+        The value index of every cell of the known solution in row-major order. None if the board was not complete
+        when the session started
+        """
+
+        self.__valueOrders: Optional[List[List[int]]] = None
+        """
+        The order that value indices are tried in for each cell, starting with the value of the known solution. None
+        if there is no known solution
+        """
+
+        if self.__solution is not None:
+            self.__valueOrders = [
+                [valueIndex] + [other for other in range(self.__length) if other != valueIndex]
+                for valueIndex in self.__solution
+            ]
+
+        self.__matrix: Optional[_ExactCoverMatrix] = None
+        """
+        The exact cover structure containing every candidate row of the sudoku board. None if the bitboard engine
+        is used. If there is a known solution, every row of the solution is linked before any other row, so the rows
+        of the solution come first in every column
+        """
+
+        self.__positions: Optional[List[int]] = None
+        """
+        The position in the exact cover structure of every candidate row. None if the rows are in their usual order
+        """
+
+        if RegularSolverEngine.DANCING_LINKS == engine:
+            if self.__valueOrders is None:
+                self.__matrix = _new_matrix(puzzle)
+            else:
+                (self.__matrix, self.__positions) = _ordered_matrix(puzzle, self.__valueOrders)
+
+        self.__grid: List[int] = [-1] * (self.__length * self.__length)
+        """
+        The value index of every given in row-major order. -1 marks a cell that is not a given
+        """
+
+        self.__covered: List[bool] = [False] * (4 * self.__length * self.__length)
+        """
+        Indicates which columns are currently covered by a selected given
+        """
+
+        self.__selected: List[Tuple[int, int]] = []
+        """
+        Stack of the cells whose givens are currently selected, in selection order. Selections must be undone in the
+        reverse order that they were made in
+        """
+
+        self.__rows: Dict[Tuple[int, int], int] = {}
+        """
+        Maps the cells on the selection stack to the candidate row that was selected for them
+        """
+
+        if order is None:
+            order = [(rowIndex, colIndex) for rowIndex in range(self.__length) for colIndex in range(self.__length)]
+
+        for (rowIndex, colIndex) in reversed(order):
+            self.restore(rowIndex, colIndex, puzzle.get(rowIndex, colIndex))
+
+    def __position(self, row: int) -> int:
+        """
+        Returns the position of the given candidate row in the exact cover structure. Shall only be called from
+        within the _RegularSolverSession class
+        :param row: The index of the candidate row
+        :return: The position of the candidate row in the exact cover structure
+        """
+
+        return row if self.__positions is None else self.__positions[row]
+
+    def __select(self, cell: Tuple[int, int], row: int) -> bool:
+        """
+        Covers every column of the given candidate row and pushes it onto the selection stack. Shall only be called
+        from within the _RegularSolverSession class
+        :param cell: The row and column indices of the cell the candidate row belongs to
+        :param row: The index of the candidate row to be selected
+        :return: True if the row was selected, False if one of its columns is already covered
+        """
+
+        columns = self.__template[row]
+
+        for col in columns:
+            if self.__covered[col]:
+                return False
+
+        for col in columns:
+            self.__covered[col] = True
+
+        if self.__matrix is not None:
+            self.__matrix.select_row(self.__position(row))
+
+        self.__grid[cell[0] * self.__length + cell[1]] = row % self.__length
+        self.__selected.append(cell)
+        self.__rows[cell] = row
+
+        return True
+
+    def __deselect(self) -> Tuple[Tuple[int, int], int]:
+        """
+        Pops the most recently selected candidate row and uncovers its columns. Shall only be called from within the
+        _RegularSolverSession class
+        :return: The cell and candidate row that were deselected
+        """
+
+        cell = self.__selected.pop()
+        row = self.__rows.pop(cell)
+
+        if self.__matrix is not None:
+            self.__matrix.deselect_row(self.__position(row))
+
+        for col in self.__template[row]:
+            self.__covered[col] = False
+
+        self.__grid[cell[0] * self.__length + cell[1]] = -1
+
+        return (cell, row)
+
+    def remove(self, rowIndex: int, colIndex: int):
+        """
+        Stops treating the given cell as a given. With the dancing links engine, every selection made after that
+        given is undone and then redone, so this is cheapest for the most recently selected givens. Does nothing if
+        the cell is not a given
+        :param rowIndex: The row index of the cell to be removed
+        :param colIndex: The column index of the cell to be removed
+        """
+
+        cell = (rowIndex, colIndex)
+
+        if cell not in self.__rows:
+            return
+
+        if self.__matrix is None:
+            self.__selected.remove(cell)
+            self.__selected.append(cell)
+
+        undone = []
+
+        while self.__selected[-1] != cell:
+            undone.append(self.__deselect())
+
+        self.__deselect()
+
+        for (otherCell, row) in reversed(undone):
+            self.__select(otherCell, row)
+
+    def restore(self, rowIndex: int, colIndex: int, value: Optional[str]):
+        """
+        Treats the given cell as a given with the supplied value. Does nothing if the value is None
+        :param rowIndex: The row index of the cell to be restored
+        :param colIndex: The column index of the cell to be restored
+        :param value: The value of the given
+        :raises StateError: If the cell is already a given or the value conflicts with the other givens
+        """
+
+        if value is None:
+            return
+
+        cell = (rowIndex, colIndex)
+
+        if cell in self.__rows:
+            raise StateError(f"Cell is already a given: [rowIndex: {rowIndex}, colIndex: {colIndex}]")
+
+        row = _index(rowIndex, colIndex, self.__legal.index(value), self.__length)
+
+        if not self.__select(cell, row):
+            raise StateError(f"Given conflicts with other givens: [rowIndex: {rowIndex}, colIndex: {colIndex}]")
+
+    def has_unique_solution(
+            self,
+            stats: Optional[SolverStats]=None,
+            budget: Optional[SolverBudget]=None
+    ) -> Optional[bool]:
+        """
+        Checks if the current set of givens has exactly one solution. The exact cover structure is left unchanged,
+        even if the budget runs out
+        :param stats: Collects statistics about the search. Nothing is recorded if None
+        :param budget: Limits the work done by the search. Unlimited if None
+        :return: True if there is exactly one solution, False if there is more than one or None if the budget ran
+            out before that could be decided
+        :raises StateError: If there are no solutions
+        """
+
+        start = perf_counter()
+
+        counter = None if budget is None else budget._start()
+
+        try:
+            if self.__matrix is None:
+                solutions = _bitboard_solutions(
+                    self.__grid, self.__length, self.__boxRows, self.__boxCols, self.__valueOrders, stats, counter
+                )
+                solutionCount = _count_solutions(solutions)
+            else:
+                solutionCount = self.__matrix.count_solutions(2, stats, counter)
+        except _BudgetExhausted:
+            return None
+        finally:
+            if stats is not None:
+                stats._time(perf_counter() - start)
+
+        if 0 == solutionCount:
+            raise StateError("No solutions found")
+        else:
+            return 1 == solutionCount
+
+    def has_alternate_solution(
+            self,
+            rowIndex: int,
+            colIndex: int,
+            stats: Optional[SolverStats]=None,
+            budget: Optional[SolverBudget]=None
+    ) -> Optional[bool]:
+        """
+        Checks if the current set of givens has a solution whose value at the given cell differs from the known
+        solution. Only holds as a uniqueness check if the givens had a unique solution before the cell was removed.
+        Only whether any solution exists is asked. With the dancing links engine, the row of the known value is hidden
+        and a single search is made, which is free to branch wherever the fewest choices remain. With the bitboard
+        engine, each other value that the cell can still take is tried in turn. The other cells try the value of the
+        known solution first
+        :param rowIndex: The row index of the removed cell
+        :param colIndex: The column index of the removed cell
+        :param stats: Collects statistics about the search. Nothing is recorded if None
+        :param budget: Limits the work done by the whole check. Unlimited if None
+        :return: True if there is an alternate solution, False if there is none or None if the budget ran out before
+            that could be decided
+        :raises StateError: If there is no known solution or the cell is still a given
+        """
+
+        if self.__solution is None:
+            raise StateError("The solution of the board is not known")
+        if (rowIndex, colIndex) in self.__rows:
+            raise StateError(f"Cell is still a given: [rowIndex: {rowIndex}, colIndex: {colIndex}]")
+
+        start = perf_counter()
+        index = rowIndex * self.__length + colIndex
+        original = self.__solution[index]
+
+        counter = None if budget is None else budget._start()
+
+        try:
+            if self.__matrix is not None:
+                position = self.__position(_index(rowIndex, colIndex, original, self.__length))
+
+                self.__matrix.hide_row(position)
+
+                try:
+                    return 0 != self.__matrix.count_solutions(1, stats, counter)
+                finally:
+                    self.__matrix.unhide_row(position)
+
+            for valueIndex in self.__valueOrders[index]:
+                row = _index(rowIndex, colIndex, valueIndex, self.__length)
+
+                if original == valueIndex or any(self.__covered[col] for col in self.__template[row]):
+                    continue
+
+                grid = self.__grid[:]
+                grid[index] = valueIndex
+                solutions = _bitboard_solutions(
+                    grid, self.__length, self.__boxRows, self.__boxCols, self.__valueOrders, stats, counter
+                )
+
+                if 0 != _count_solutions(solutions, 1):
+                    return True
+
+            return False
+        except _BudgetExhausted:
+            return None
+        finally:
+            if stats is not None:
+                stats._time(perf_counter() - start)
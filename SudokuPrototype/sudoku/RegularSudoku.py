@@ -2,59 +2,110 @@ from __future__ import annotations
 
 from final_class import final
 from enum import Enum
+from random import Random
 from typing import List, Optional, Iterable, Dict, Tuple
 from sudoku.Cell import _Cell
 from sudoku.StateError import StateError
 
+@final
+class RegularSolverEngine(Enum):
+    """
+    Specifies the search engines available for solving regular sudoku boards.
+    Each value has a corresponding dictionary specifying various properties
+    of the engine. The only property contained in each dictionary is 'title'.
+    'title' provides a string representation of the engine's name
+    """
+
+    DANCING_LINKS: Dict[str, str] = { "title": "Dancing Links" }
+    """
+    Exact cover search over a dancing links matrix. Scales best to the largest boards
+    """
+
+    BITBOARD: Dict[str, str] = { "title": "Bitboard" }
+    """
+    Backtracking search over per-row, per-column and per-box candidate bitmasks, with naked and hidden
+    singles filled in before every branch. Has the least overhead on most board sizes
+    """
+
+@final
+class RegularFillMethod(Enum):
+    """
+    Specifies the ways that a regular sudoku board can be completely filled before givens are removed.
+    Each value has a corresponding dictionary specifying various properties
+    of the method. The only property contained in each dictionary is 'title'.
+    'title' provides a string representation of the method's name
+    """
+
+    SEARCH: Dict[str, str] = { "title": "Search" }
+    """
+    Fills independent boxes at random and completes the board with the first solution found by the solver engine,
+    with every cell trying its values in a shuffled order. Can produce any valid board
+    """
+
+    BACKTRACK: Dict[str, str] = { "title": "Backtrack" }
+    """
+    Fills independent boxes at random and completes the board with a randomized backtracking search on the board
+    itself, always branching on the most constrained cell and filling forced values after every guess. Needs no
+    solver engine and can produce any valid board
+    """
+
+    PATTERN: Dict[str, str] = { "title": "Pattern" }
+    """
+    Builds the board from a fixed pattern and randomly permutes its values, bands, stacks, rows within bands and
+    columns within stacks. Takes the same time on every board, but only produces boards equivalent to the pattern
+    """
+
 @final
 class RegularDimension(Enum):
     """
     Specifies the dimensions allowed for regular sudoku boards.
     Each value has a corresponding dictionary specifying various properties
     for boards of the given number of dimensions. The properties contained
-    in each dictionary are 'length', 'boxRows', 'boxCols' and 'legal'.
+    in each dictionary are 'length', 'boxRows', 'boxCols', 'legal', 'engine' and 'fill'.
     'length' specifies the total number of rows and columns for a board.
     'boxRows' specifies the number of rows in each box.
     'boxCols' specifies the number of columns in each box.
-    'legal' specifies the valid characters for the board, in sorted order
+    'legal' specifies the valid characters for the board, in sorted order.
+    'engine' specifies the solver engine that is fastest for boards of this size.
+    'fill' specifies the fill method used to make the solved board that givens are removed from
     """
 
-    EIGHT: Dict[str, int | str] = { "length": 8, "boxRows": 4, "boxCols": 2, "legal": "01234567" }
+    EIGHT: Dict[str, int | str | RegularSolverEngine | RegularFillMethod] = { "length": 8, "boxRows": 4, "boxCols": 2, "legal": "01234567", "engine": RegularSolverEngine.BITBOARD, "fill": RegularFillMethod.SEARCH }
     """
     Info for 8x8 boards. See docstring of 'RegularDimension for more details
     """
 
-    NINE: Dict[str, int | str] = { "length": 9, "boxRows": 3, "boxCols": 3, "legal": "123456789" }
+    NINE: Dict[str, int | str | RegularSolverEngine | RegularFillMethod] = { "length": 9, "boxRows": 3, "boxCols": 3, "legal": "123456789", "engine": RegularSolverEngine.BITBOARD, "fill": RegularFillMethod.SEARCH }
     """
     Info for 9x9 boards. See docstring of 'RegularDimension for more details
     """
 
-    TEN: Dict[str, int | str] = { "length": 10, "boxRows": 2, "boxCols": 5, "legal": "0123456789" }
+    TEN: Dict[str, int | str | RegularSolverEngine | RegularFillMethod] = { "length": 10, "boxRows": 2, "boxCols": 5, "legal": "0123456789", "engine": RegularSolverEngine.BITBOARD, "fill": RegularFillMethod.SEARCH }
     """
     Info for 10x10 boards. See docstring of 'RegularDimension for more details
     """
 
-    ELEVEN: Dict[str, int | str] = { "length": 11, "boxRows": 1, "boxCols": 11, "legal": "123456789AB" }
+    ELEVEN: Dict[str, int | str | RegularSolverEngine | RegularFillMethod] = { "length": 11, "boxRows": 1, "boxCols": 11, "legal": "123456789AB", "engine": RegularSolverEngine.BITBOARD, "fill": RegularFillMethod.SEARCH }
     """
     Info for 11x11 boards. See docstring of 'RegularDimension for more details
     """
 
-    TWELVE: Dict[str, int | str] = { "length": 12, "boxRows": 3, "boxCols": 4, "legal": "0123456789AB" }
+    TWELVE: Dict[str, int | str | RegularSolverEngine | RegularFillMethod] = { "length": 12, "boxRows": 3, "boxCols": 4, "legal": "0123456789AB", "engine": RegularSolverEngine.BITBOARD, "fill": RegularFillMethod.SEARCH }
     """
     Info for 12x12 boards. See docstring of 'RegularDimension for more details
     """
 
-    THIRTEEN: Dict[str, int | str] = { "length": 13, "boxRows": 13, "boxCols": 1, "legal": "0123456789ABC" }
+    THIRTEEN: Dict[str, int | str | RegularSolverEngine | RegularFillMethod] = { "length": 13, "boxRows": 13, "boxCols": 1, "legal": "0123456789ABC", "engine": RegularSolverEngine.BITBOARD, "fill": RegularFillMethod.SEARCH }
     """
     Info for 13x13 boards. See docstring of 'RegularDimension for more details
     """
 
-    FIFTEEN: Dict[str, int | str] = { "length": 15, "boxRows": 5, "boxCols": 3, "legal": "123456789ABCDEF" }
+    FIFTEEN: Dict[str, int | str | RegularSolverEngine | RegularFillMethod] = { "length": 15, "boxRows": 5, "boxCols": 3, "legal": "123456789ABCDEF", "engine": RegularSolverEngine.BITBOARD, "fill": RegularFillMethod.SEARCH }
     """
     Info for 15x15 boards. See docstring of 'RegularDimension for more details
     """
 
-    SIXTEEN: Dict[str, int | str] = { "length": 16, "boxRows": 4, "boxCols": 4, "legal": "0123456789ABCDEF" }
+    SIXTEEN: Dict[str, int | str | RegularSolverEngine | RegularFillMethod] = { "length": 16, "boxRows": 4, "boxCols": 4, "legal": "0123456789ABCDEF", "engine": RegularSolverEngine.DANCING_LINKS, "fill": RegularFillMethod.SEARCH }
     """
     Info for 16x16 boards. See docstring of 'RegularDimension for more details
     """
@@ -104,12 +155,18 @@ class RegularInfo:
     will be used to construct and initialize a regular sudoku board
     """
 
-    def __init__(self, dimensions: RegularDimension, difficulty: RegularDifficulty):
+    def __init__(
+            self,
+            dimensions: RegularDimension,
+            difficulty: RegularDifficulty,
+            fill: Optional[RegularFillMethod]=None
+    ):
         """
         Stores the values contained in the dictionaries of both the dimension and
         difficulty settings
         :param dimensions: The dimension settings to use
         :param difficulty: The difficulty settings to use
+        :param fill: The fill method to use. The fill method of the dimension settings is used if None
         """
 
         dimensionsDict = dimensions.value
@@ -135,6 +192,16 @@ class RegularInfo:
         The list of legal values for the sudoku board
         """
 
+        self.__engine = dimensionsDict["engine"]
+        """
+        The solver engine used for the sudoku board
+        """
+
+        self.__fill = dimensionsDict["fill"] if fill is None else fill
+        """
+        The fill method used to make the solved sudoku board
+        """
+
         self.__difficulty = difficultyDict["title"]
         """
         The name of the difficulty level being used for the sudoku board
@@ -212,6 +279,24 @@ class RegularInfo:
 
         return self.__legal
 
+    @property
+    def engine(self) -> RegularSolverEngine:
+        """
+        Returns the solver engine that is fastest for the dimensions of the sudoku board
+        :return: The solver engine that is fastest for the dimensions of the sudoku board
+        """
+
+        return self.__engine
+
+    @property
+    def fill(self) -> RegularFillMethod:
+        """
+        Returns the fill method used to make the solved sudoku board
+        :return: The fill method used to make the solved sudoku board
+        """
+
+        return self.__fill
+
     @property
     def difficulty(self) -> str:
         """
@@ -341,6 +426,20 @@ class _RegularSafety:
         self.__colSafety[colIndex] &= mask
         self.__boxSafety[boxIndex] &= mask
 
+    def candidates(self, rowIndex: int, colIndex: int, boxIndex: int) -> int:
+        """
+        Returns the bit vector of the values that are safe in the given row, column and box at once
+        :param rowIndex: The row index to be checked
+        :param colIndex: The column index to be checked
+        :param boxIndex: The box index to be checked
+        :return: The bit vector of the values that are safe at the given indices
+        :raises IndexError: If any of the supplied indices are outside the bounds of the safety table
+        """
+
+        self.__check_bounds([rowIndex, colIndex, boxIndex])
+
+        return self.__rowSafety[rowIndex] & self.__colSafety[colIndex] & self.__boxSafety[boxIndex]
+
     def weight(self, rowIndex: int, colIndex: int, boxIndex: int) -> (int, int, int):
         """
         Returns the hamming weight at each index
@@ -459,6 +558,13 @@ class RegularSudoku:
     the board is not restricted to being 9x9
     """
 
+    __zobristKeys: Dict[int, List[int]] = {}
+    """
+    Random 64-bit keys for every cell and value of every board length. Slot 0 of each cell is used for illegal
+    values. Generated from a fixed seed, so hashes are the same in every process. Shall only be accessed from within
+    the RegularSudoku class
+    """
+
     def __init__(self, info: RegularInfo, table: List[_Cell], safety: _RegularSafety):
         """
         Makes a sudoku board with the specified initialization parameters. Shall only be called from within the
@@ -489,6 +595,59 @@ class RegularSudoku:
         Indicates whether or not the sudoku board is ready for gameplay
         """
 
+        self.__keys: List[int] = RegularSudoku.__zobrist_keys(info.length)
+        """
+        The Zobrist keys for this sudoku board's length
+        """
+
+        self.__hash: int = 0
+        """
+        The XOR of the Zobrist key of every filled cell. Updated on every change to the board
+        """
+
+        for (index, cell) in enumerate(table):
+            if cell.value is not None:
+                self.__hash ^= self.__key(index, cell.value)
+
+    @staticmethod
+    def __zobrist_keys(length: int) -> List[int]:
+        """
+        Returns the Zobrist keys for boards of the given length, generating them the first time they are needed.
+        Shall only be called from within the RegularSudoku class
+        :param length: The number of rows and columns of the board
+        :return: The keys of every cell and value, with length + 1 slots per cell in row-major order
+        """
+
+        keys = RegularSudoku.__zobristKeys.get(length)
+
+        if keys is None:
+            generator = Random(length)
+            keys = [generator.getrandbits(64) for _ in range(length * length * (length + 1))]
+            RegularSudoku.__zobristKeys[length] = keys
+
+        return keys
+
+    def __key(self, index: int, value: str) -> int:
+        """
+        Returns the Zobrist key of the given value at the given cell. Shall only be called from within the
+        RegularSudoku class
+        :param index: The row-major index of the cell
+        :param value: The value in the cell
+        :return: The Zobrist key of the value at the cell
+        """
+
+        return self.__keys[index * (self.length + 1) + self.__order(value) + 1]
+
+    @property
+    def _hash(self) -> int:
+        """
+        Returns the Zobrist hash of the values currently on this sudoku board. Boards of the same length with the
+        same values have the same hash. Shall only be called from within the sudoku package
+        :return: The Zobrist hash of the values currently on this sudoku board
+        """
+
+        return self.__hash
+
     def __order(self, value: str) -> int:
         """
         Returns the sorted position as an index of the supplied value.
@@ -584,6 +743,15 @@ class RegularSudoku:
 
         return self.__info.legal
 
+    @property
+    def engine(self) -> RegularSolverEngine:
+        """
+        Returns the solver engine that is fastest for the dimensions of this sudoku board
+        :return: The solver engine that is fastest for the dimensions of this sudoku board
+        """
+
+        return self.__info.engine
+
     @property
     def difficulty(self) -> str:
         """
@@ -677,6 +845,82 @@ class RegularSudoku:
 
         self.__safety.set_safe(rowIndex, colIndex, boxIndex, valueIndex)
 
+    def _candidates(self, rowIndex: int, colIndex: int) -> int:
+        """
+        Returns the bit vector of the values that can be safely placed at the given indices. Bit i corresponds to the
+        value at index i of the sorted string of legal values. Shall only be called from within the sudoku package
+        :param rowIndex: The row index of the cell to be checked
+        :param colIndex: The column index of the cell to be checked
+        :return: The bit vector of the values that can be safely placed at the given indices
+        :raises IndexError: If the row and column indices are outside the bounds of the board
+        """
+
+        self.__check_bounds(rowIndex, colIndex)
+
+        boxIndex = self.__box_index(rowIndex, colIndex)
+
+        return self.__safety.candidates(rowIndex, colIndex, boxIndex)
+
+    def _open_candidates(self) -> List[Tuple[int, int, int]]:
+        """
+        Lists every empty cell of this sudoku board along with the bit vector of the values that can be safely placed
+        in it. Bit i corresponds to the value at index i of the sorted string of legal values. Walks the cells directly,
+        without checking the bounds of every cell. Shall only be called from within the sudoku package
+        :return: A list of tuples containing the row index, column index and bit vector of safe values of every empty
+            cell, in row-major order
+        """
+
+        length = self.length
+        safety = self.__safety
+        result = []
+
+        for (index, cell) in enumerate(self.__table):
+            if cell.value is None:
+                (rowIndex, colIndex) = divmod(index, length)
+                boxIndex = self.__box_index(rowIndex, colIndex)
+
+                result.append((rowIndex, colIndex, safety.candidates(rowIndex, colIndex, boxIndex)))
+
+        return result
+
+    def _permute(self, sources: List[int], symbols: List[int]):
+        """
+        Rearranges the values of this sudoku board in a single pass. The cell at each row-major index takes the value
+        of the cell at the matching entry of sources, relabeled through symbols. The safety table and hash are rebuilt
+        once at the end rather than updated for every cell. Every row, column and box must map onto a row, column or
+        box for the board to stay valid. Shall only be called from within the sudoku package
+        :param sources: The row-major index of the cell that each cell takes its value from
+        :param symbols: The value index that each value index is relabeled to
+        :raises StateError: If the sudoku board is ready for gameplay
+        """
+
+        if self.__finalized:
+            raise StateError("This sudoku board is ready for gameplay")
+
+        length = self.length
+        legalValues = self.__info.legal
+        order = {value: index for (index, value) in enumerate(legalValues)}
+        valueIndices = [None if cell.value is None else order[cell.value] for cell in self.__table]
+        safety = _RegularSafety(length)
+        keys = self.__keys
+        newHash = 0
+
+        for (index, cell) in enumerate(self.__table):
+            valueIndex = valueIndices[sources[index]]
+
+            if valueIndex is None:
+                cell.value = None
+            else:
+                valueIndex = symbols[valueIndex]
+                (rowIndex, colIndex) = divmod(index, length)
+
+                cell.value = legalValues[valueIndex]
+                safety.set_unsafe(rowIndex, colIndex, self.__box_index(rowIndex, colIndex), valueIndex)
+                newHash ^= keys[index * (length + 1) + valueIndex + 1]
+
+        self.__safety = safety
+        self.__hash = newHash
+
     def _givens(self, rowIndex: int, colIndex: int) -> Tuple[int, int, int]:
         """
         Computes the number of givens in the unit that the provided row and column indices
@@ -692,6 +936,23 @@ class RegularSudoku:
 
         return (length - rowEmptyCount, length - colEmptyCount, length - boxEmptyCount)
 
+    def _grid(self) -> List[int]:
+        """
+        Encodes the values of this sudoku board as a row-major list of value indices, where -1 marks an empty cell and
+        every other entry is the position of the value in the sorted string of legal values. Shall only be called from
+        within the sudoku package
+        :return: The value index of every cell of this sudoku board in row-major order
+        """
+
+        grid = []
+
+        for cell in self.__table:
+            value = cell.value
+
+            grid.append(-1 if value is None else self.__order(value))
+
+        return grid
+
     def __get_cell(self, rowIndex: int, colIndex: int) -> _Cell:
         """
         Retrieves the cell at the given row and column indices. Shall only be called from within the
@@ -753,10 +1014,16 @@ class RegularSudoku:
         """
 
         cell = self.__get_cell(rowIndex, colIndex)
+        index = self.__actual_index(rowIndex, colIndex)
 
         oldValue = cell.value
         cell.value = newValue
 
+        if oldValue is not None:
+            self.__hash ^= self.__key(index, oldValue)
+        if newValue is not None:
+            self.__hash ^= self.__key(index, newValue)
+
         if not self.__finalized:
             if oldValue is not None:
                 self.__set_safe(rowIndex, colIndex, oldValue)
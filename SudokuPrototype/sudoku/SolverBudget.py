@@ -0,0 +1,119 @@
+from time import perf_counter
+from typing import Optional
+from final_class import final
+
+@final
+class _BudgetExhausted(Exception):
+    """
+    Raised inside a search once its budget runs out, unwinding the search. Shall only be used from within the sudoku
+    package
+    """
+
+@final
+class _BudgetCounter:
+    """
+    The work done so far by a single uniqueness check, charged by the search as it visits nodes. Every check gets a
+    counter of its own, so checks that share a budget can run at the same time. Shall only be used from within the
+    sudoku package
+    """
+
+    __CLOCK_INTERVAL: int = 64
+    """
+    The number of nodes visited between reads of the clock. Shall only be accessed from within the _BudgetCounter
+    class
+    """
+
+    def __init__(self, maxNodes: Optional[int], timeLimit: Optional[float]):
+        """
+        Starts counting the work of a new check
+        :param maxNodes: The number of search nodes the check may visit. Unlimited if None
+        :param timeLimit: The number of seconds the check may take. Unlimited if None
+        """
+
+        self.__maxNodes: Optional[int] = maxNodes
+        """
+        The number of search nodes the check may visit. Unlimited if None
+        """
+
+        self.__nodes: int = 0
+        """
+        The number of search nodes visited by the check
+        """
+
+        self.__deadline: Optional[float] = None if timeLimit is None else perf_counter() + timeLimit
+        """
+        The clock reading after which the check gives up. Unlimited if None
+        """
+
+    def _spend(self):
+        """
+        Records a visit to a search node. The clock is only read every few nodes. Shall only be called from within
+        the sudoku package
+        :raises _BudgetExhausted: If the node count or time limit has run out
+        """
+
+        self.__nodes += 1
+
+        if self.__maxNodes is not None and self.__nodes > self.__maxNodes:
+            raise _BudgetExhausted()
+
+        if self.__deadline is not None and 0 == self.__nodes % _BudgetCounter.__CLOCK_INTERVAL:
+            if perf_counter() > self.__deadline:
+                raise _BudgetExhausted()
+
+@final
+class SolverBudget:
+    """
+    Limits the work done by each uniqueness check. Every check that is given the budget starts with the full node
+    count and time limit, and gives up once either runs out. The budget itself never changes, so it can be shared by
+    checks running at the same time
+    """
+
+    def __init__(self, max_nodes: Optional[int]=None, time_limit: Optional[float]=None):
+        """
+        Makes a budget with the given limits
+        :param max_nodes: The number of search nodes each check may visit. Unlimited if None
+        :param time_limit: The number of seconds each check may take. Unlimited if None
+        :raises ValueError: If max_nodes is less than 1 or time_limit is not positive
+        """
+
+        if max_nodes is not None and max_nodes < 1:
+            raise ValueError(f"max_nodes must be at least 1: {max_nodes}")
+        if time_limit is not None and time_limit <= 0:
+            raise ValueError(f"time_limit must be positive: {time_limit}")
+
+        self.__maxNodes: Optional[int] = max_nodes
+        """
+        The number of search nodes each check may visit. Unlimited if None
+        """
+
+        self.__timeLimit: Optional[float] = time_limit
+        """
+        The number of seconds each check may take. Unlimited if None
+        """
+
+    @property
+    def max_nodes(self) -> Optional[int]:
+        """
+        Returns the number of search nodes each check may visit
+        :return: The number of search nodes each check may visit or None if unlimited
+        """
+
+        return self.__maxNodes
+
+    @property
+    def time_limit(self) -> Optional[float]:
+        """
+        Returns the number of seconds each check may take
+        :return: The number of seconds each check may take or None if unlimited
+        """
+
+        return self.__timeLimit
+
+    def _start(self) -> _BudgetCounter:
+        """
+        Starts a new check with the full budget. Shall only be called from within the sudoku package
+        :return: The counter to be charged by the search of the check
+        """
+
+        return _BudgetCounter(self.__maxNodes, self.__timeLimit)
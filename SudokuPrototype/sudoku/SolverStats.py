@@ -0,0 +1,181 @@
+from typing import List
+from final_class import final
+
+@final
+class SolverStats:
+    """
+    Collects statistics about the searches of the solver engines. Pass the same collector to several searches to
+    accumulate their statistics. Searches that are not given a collector record nothing
+    """
+
+    def __init__(self):
+        """
+        Makes a collector with every statistic at zero
+        """
+
+        self.__nodes: int = 0
+        """
+        The number of search nodes visited, which is the number of choices tried while branching
+        """
+
+        self.__covers: int = 0
+        """
+        The number of columns covered by the dancing links engine or values placed by the bitboard engine
+        """
+
+        self.__uncovers: int = 0
+        """
+        The number of columns uncovered by the dancing links engine or values removed by the bitboard engine
+        """
+
+        self.__maxDepth: int = 0
+        """
+        The largest number of choices that were on the search stack at once
+        """
+
+        self.__branchPoints: List[int] = []
+        """
+        The number of times the search branched at each depth
+        """
+
+        self.__branchChoices: List[int] = []
+        """
+        The total number of choices available at each depth over every time the search branched there
+        """
+
+        self.__wallTime: float = 0.0
+        """
+        The number of seconds spent searching, not counting time spent by the caller between solutions
+        """
+
+    @property
+    def nodes(self) -> int:
+        """
+        Returns the number of search nodes visited, which is the number of choices tried while branching
+        :return: The number of search nodes visited
+        """
+
+        return self.__nodes
+
+    @property
+    def covers(self) -> int:
+        """
+        Returns the number of columns covered by the dancing links engine or values placed by the bitboard engine
+        :return: The number of covers
+        """
+
+        return self.__covers
+
+    @property
+    def uncovers(self) -> int:
+        """
+        Returns the number of columns uncovered by the dancing links engine or values removed by the bitboard engine
+        :return: The number of uncovers
+        """
+
+        return self.__uncovers
+
+    @property
+    def max_depth(self) -> int:
+        """
+        Returns the largest number of choices that were on the search stack at once
+        :return: The maximum search depth
+        """
+
+        return self.__maxDepth
+
+    @property
+    def branching_factors(self) -> List[float]:
+        """
+        Returns the average number of choices available each time the search branched, for every depth. Depths that
+        the search never branched at have an average of 0
+        :return: The average branching factor at each depth, starting at depth 0
+        """
+
+        return [
+            0.0 if 0 == points else choices / points
+            for (points, choices) in zip(self.__branchPoints, self.__branchChoices)
+        ]
+
+    @property
+    def wall_time(self) -> float:
+        """
+        Returns the number of seconds spent searching, not counting time spent by the caller between solutions
+        :return: The number of seconds spent searching
+        """
+
+        return self.__wallTime
+
+    def _cover(self, count: int=1):
+        """
+        Records covers or placements. Shall only be called from within the sudoku package
+        :param count: The number of covers or placements to be recorded
+        """
+
+        self.__covers += count
+
+    def _uncover(self):
+        """
+        Records an uncover or a removal. Shall only be called from within the sudoku package
+        """
+
+        self.__uncovers += 1
+
+    def _node(self, depth: int):
+        """
+        Records a visit to a search node at the given depth. Shall only be called from within the sudoku package
+        :param depth: The number of choices on the search stack once the node is visited
+        """
+
+        self.__nodes += 1
+
+        if depth > self.__maxDepth:
+            self.__maxDepth = depth
+
+    def _branch(self, depth: int, choices: int):
+        """
+        Records that the search branched at the given depth. Shall only be called from within the sudoku package
+        :param depth: The number of choices on the search stack before branching
+        :param choices: The number of choices available to branch on
+        """
+
+        while len(self.__branchPoints) <= depth:
+            self.__branchPoints.append(0)
+            self.__branchChoices.append(0)
+
+        self.__branchPoints[depth] += 1
+        self.__branchChoices[depth] += choices
+
+    def _time(self, seconds: float):
+        """
+        Adds the given time to the time spent searching. Shall only be called from within the sudoku package
+        :param seconds: The number of seconds to be added
+        """
+
+        self.__wallTime += seconds
+
+    def __str__(self):
+        """
+        Makes a string representation of the collected statistics
+        :return: A string representation of the collected statistics
+        """
+
+        factors = ", ".join(f"{factor:.2f}" for factor in self.branching_factors)
+
+        return (
+            f"Solver Stats:\n"
+            f"\tNodes: {self.__nodes}\n"
+            f"\tCovers: {self.__covers}\n"
+            f"\tUncovers: {self.__uncovers}\n"
+            f"\tMax Depth: {self.__maxDepth}\n"
+            f"\tBranching Factors: [{factors}]\n"
+            f"\tWall Time: {self.__wallTime:.6f}s\n"
+        )
+
+    def __repr__(self):
+        """
+        Returns the same result as __str__
+        :return: The same result as __str__
+        """
+
+        return str(self)
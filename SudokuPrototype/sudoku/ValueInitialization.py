@@ -1,77 +1,251 @@
-from typing import List, Dict, Tuple
-from random import shuffle
+from typing import List, Dict, Tuple, Optional
+from random import Random
 from copy import copy
 from sudoku.StateError import StateError
-from sudoku.RegularSudoku import RegularSudoku
+from sudoku.RegularSudoku import RegularSolverEngine, RegularFillMethod, RegularSudoku
+from sudoku.RegularSolver import _solutions
+from sudoku.RegularShuffler import _permuted_lines
 
-def __next(puzzle: RegularSudoku, rowIndex: int, colIndex: int) -> (int, int):
+def __most_constrained(puzzle: RegularSudoku) -> Optional[Tuple[int, int, int]]:
     """
-    Computes the row and column indices of the next position to be filled. Fills the entire, current row before moving
-    to the next row. Shall only be called from within the ValueInitialization.py file
-    :param puzzle: The sudoku board whose next open cell is to be searched for
-    :param rowIndex: The row index to be used to determine the next position
-    :param colIndex: The column index to be used to determine the next position
-    :return: A tuple containing the next pair of row and column indices to be initialized with a value
+    Finds the empty cell with the fewest values that can be safely placed in it. The search stops early at a cell with
+    no more than one such value. Shall only be called from within the ValueInitialization.py file
+    :param puzzle: The sudoku board whose most constrained open cell is to be searched for
+    :return: A tuple containing the row index, column index and bit vector of safe values of the most constrained
+        open cell, or None if the board has no open cells
+    """
+
+    best = None
+    bestCount = puzzle.length + 1
+
+    for cell in puzzle._open_candidates():
+        count = cell[2].bit_count()
+
+        if count < bestCount:
+            best = cell
+            bestCount = count
+
+            if count <= 1:
+                return best
+
+    return best
+
+def __units(puzzle: RegularSudoku) -> List[List[Tuple[int, int]]]:
+    """
+    Lists the row and column indices of the cells of every row, column and box of the board. Shall only be called
+    from within the ValueInitialization.py file
+    :param puzzle: The sudoku board whose units are to be listed
+    :return: A list containing the cells of every row, column and box
     """
 
     length = puzzle.length
+    boxRows = puzzle.box_rows
+    boxCols = puzzle.box_cols
+    units = []
+
+    for index in range(length):
+        units.append([(index, colIndex) for colIndex in range(length)])
+        units.append([(rowIndex, index) for rowIndex in range(length)])
+
+    for startRowIndex in range(0, length, boxRows):
+        for startColIndex in range(0, length, boxCols):
+            units.append([
+                (rowIndex, colIndex)
+                for rowIndex in range(startRowIndex, startRowIndex + boxRows)
+                for colIndex in range(startColIndex, startColIndex + boxCols)
+            ])
+
+    return units
+
+def __undo(puzzle: RegularSudoku, placed: List[Tuple[int, int]]):
+    """
+    Erases the given cells in the reverse order that they were filled. Shall only be called from within the
+    ValueInitialization.py file
+    :param puzzle: The sudoku board to have its cells erased
+    :param placed: The row and column indices of the cells to be erased
+    """
+
+    for (rowIndex, colIndex) in reversed(placed):
+        puzzle.delete(rowIndex, colIndex)
+
+def __find_hidden_single(
+        length: int,
+        grid: List[int],
+        openCells: Dict[Tuple[int, int], int],
+        unit: List[Tuple[int, int]]
+) -> Optional[Tuple[int, int, int]]:
+    """
+    Looks for a value that can only be placed in one cell of the given unit. Shall only be called from within the
+    ValueInitialization.py file
+    :param length: The number of rows and columns of the board
+    :param grid: The value index of every cell of the board in row-major order, where -1 marks an empty cell
+    :param openCells: The bit vector of safe values of every empty cell of the board, keyed by its row and column indices
+    :param unit: The row and column indices of the cells of a row, column or box
+    :return: A tuple containing the row index, column index and value bit of a hidden single, (-1, -1, -1) if some
+        value has no cell left in the unit or None if there are no hidden singles
+    """
+
+    once = 0
+    twice = 0
+    placed = 0
+
+    for position in unit:
+        candidates = openCells.get(position)
+
+        if candidates is None:
+            placed |= 1 << grid[position[0] * length + position[1]]
+        else:
+            twice |= once & candidates
+            once |= candidates
+
+    if ~(~0 << length) != once | placed:
+        return (-1, -1, -1)
+
+    hidden = once & ~twice
+
+    if 0 == hidden:
+        return None
+
+    mask = hidden & -hidden
+
+    for position in unit:
+        if 0 != openCells.get(position, 0) & mask:
+            return (position[0], position[1], mask)
+
+    return None
+
+def __propagate(
+        puzzle: RegularSudoku,
+        legalValues: List[str],
+        units: List[List[Tuple[int, int]]]
+) -> Optional[List[Tuple[int, int]]]:
+    """
+    Fills naked singles, and then a hidden single in some row, column or box, until nothing changes. Shall only be
+    called from within the ValueInitialization.py file
+    :param puzzle: The sudoku board to be filled
+    :param legalValues: The list of values that are allowed for this sudoku board
+    :param units: The cells of every row, column and box of the board
+    :return: The row and column indices of the filled cells in the order that they were filled, or None if the board
+        cannot be completed. Nothing is left filled in if None is returned
+    """
+
+    placed = []
+    changed = True
+
+    while changed:
+        changed = False
+
+        for (rowIndex, colIndex, candidates) in puzzle._open_candidates():
+            if 0 == candidates:
+                __undo(puzzle, placed)
+
+                return None
+            elif 0 == candidates & (candidates - 1):
+                if 0 == puzzle._candidates(rowIndex, colIndex):
+                    __undo(puzzle, placed)
+
+                    return None
+
+                puzzle.set(rowIndex, colIndex, legalValues[candidates.bit_length() - 1])
+                placed.append((rowIndex, colIndex))
+
+                changed = True
+
+        if not changed:
+            grid = puzzle._grid()
+            openCells = {(rowIndex, colIndex): candidates for (rowIndex, colIndex, candidates) in puzzle._open_candidates()}
+
+            for unit in units:
+                single = __find_hidden_single(puzzle.length, grid, openCells, unit)
 
-    while True:
-        colIndex += 1
+                if single is not None:
+                    (rowIndex, colIndex, mask) = single
 
-        if colIndex == length:
-            rowIndex += 1
-            colIndex = 0
+                    if -1 == mask:
+                        __undo(puzzle, placed)
 
-        if rowIndex == length or puzzle.get(rowIndex, colIndex) is None:
-            break
+                        return None
 
-    return (rowIndex, colIndex)
+                    puzzle.set(rowIndex, colIndex, legalValues[mask.bit_length() - 1])
+                    placed.append((rowIndex, colIndex))
+
+                    changed = True
+                    break
+
+    return placed
 
 def __initialize_values_helper2(
         puzzle: RegularSudoku,
         valueDict: Dict[Tuple[int, int], List[str]],
-        prevRowIndex: int,
-        prevColIndex: int
+        units: List[List[Tuple[int, int]]]
 ) -> bool:
     """
-    Helper to perform the task of initializing the board with values
+    Helper to perform the task of initializing the board with values. Always branches on the open cell with the fewest
+    safe values, trying them in the shuffled order of that cell. Forced values are filled in after every assignment, so
+    dead ends are found before branching any further. The search keeps its choices on an explicit stack rather than
+    recursing
     :param puzzle: The sudoku board to be initialized with values
     :param valueDict: Dictionary containing shuffled lists to iterate through when attempting to assign a value
-    :param prevRowIndex: The row index of the last cell to be assigned
-    :param prevColIndex: The column index of the last cell to be assigned
+    :param units: The cells of every row, column and box of the board
     :return: True indicates that the puzzle has been completely filled, False otherwise
     :raises StateError: If the puzzle is not in a solved state by the end of the initialization
     """
 
-    (rowIndex, colIndex) = __next(puzzle, prevRowIndex, prevColIndex)
+    bits = {value: 1 << index for (index, value) in enumerate(puzzle.legal)}
+    stack = []
+    cell = __most_constrained(puzzle)
 
-    if puzzle.length == rowIndex:
-        if not puzzle.is_solved():
-            raise StateError(f"Sudoku board must be solved by this point\n{puzzle}")
-        else:
-            return True
+    while cell is not None:
+        (rowIndex, colIndex, candidates) = cell
+
+        if 0 != candidates:
+            values = [value for value in reversed(valueDict[(rowIndex, colIndex)]) if 0 != candidates & bits[value]]
+            stack.append((rowIndex, colIndex, values, []))
+
+        while True:
+            if 0 == len(stack):
+                return False
+
+            (rowIndex, colIndex, values, placed) = stack[-1]
 
-    legalValues = valueDict[(rowIndex, colIndex)]
+            if puzzle.get(rowIndex, colIndex) is not None:
+                __undo(puzzle, placed)
+                puzzle.delete(rowIndex, colIndex)
+                placed.clear()
 
-    for value in legalValues:
-        if puzzle.is_safe(rowIndex, colIndex, value):
-            puzzle.set(rowIndex, colIndex, value)
+            if 0 == len(values):
+                stack.pop()
+                continue
 
-            if __initialize_values_helper2(puzzle, valueDict, rowIndex, colIndex):
-                return True
+            puzzle.set(rowIndex, colIndex, values.pop())
+
+            forced = __propagate(puzzle, puzzle.legal, units)
+
+            if forced is not None:
+                placed.extend(forced)
+                break
 
             puzzle.delete(rowIndex, colIndex)
 
-    return False
+        cell = __most_constrained(puzzle)
+
+    if not puzzle.is_solved():
+        raise StateError(f"Sudoku board must be solved by this point\n{puzzle}")
 
-def __shuffle_values(legalValues: List[str], puzzle: RegularSudoku) -> Dict[Tuple[int, int], List[str]]:
+    return True
+
+def __shuffle_values(
+        legalValues: List[str],
+        puzzle: RegularSudoku,
+        generator: Random
+) -> Dict[Tuple[int, int], List[str]]:
     """
     For each pair of row and column indices in the board, a shuffled version of the initial list of legal values
     will be assigned. The result of each shuffling will be assigned to a corresponding row and column index pairs via
     a dictionary. The keys are a tuple containing the row and column indices and the values are the shuffled lists to
     be used for that position of the board. Shall only be called from within the ValueInitialization.py file
     :param legalValues: The values to copy and shuffle for each pair of row and column indices
+    :param generator: The random number generator used to shuffle the values
     :return: A dictionary where the keys are the row and column indices and the values are the shuffled lists
     """
 
@@ -82,18 +256,19 @@ def __shuffle_values(legalValues: List[str], puzzle: RegularSudoku) -> Dict[Tupl
         for colIndex in range(length):
             if puzzle.get(rowIndex, colIndex) is None:
                 legalValuesCopy = copy(legalValues)
-                shuffle(legalValuesCopy)
+                generator.shuffle(legalValuesCopy)
 
                 valueDict[(rowIndex, colIndex)] = legalValuesCopy
 
     return valueDict
 
 
-def __initialize_values_helper1(puzzle: RegularSudoku, legalValues: List[str]):
+def __initialize_values_helper1(puzzle: RegularSudoku, legalValues: List[str], generator: Random):
     """
     Initializes entire boxes of values that can be assigned independently of each other
     :param puzzle: The sudoku board to have its values initialized
     :param legalValues: The list of values that are allowed for this sudoku board
+    :param generator: The random number generator used to shuffle the values of each box
     :raises StateError: If the sudoku board is not valid by the end of this function
     """
 
@@ -107,7 +282,7 @@ def __initialize_values_helper1(puzzle: RegularSudoku, legalValues: List[str]):
     while startRowIndex < length and startColIndex < length:
         index = 0
 
-        shuffle(values)
+        generator.shuffle(values)
 
         for rowIndex in range(startRowIndex, startRowIndex + boxRows):
             for colIndex in range(startColIndex, startColIndex + boxCols):
@@ -121,7 +296,93 @@ def __initialize_values_helper1(puzzle: RegularSudoku, legalValues: List[str]):
     if not puzzle.is_valid():
         raise StateError(f"Sudoku board must be valid by this point\n{puzzle}")
 
-def _initialize_values(puzzle: RegularSudoku, legalValues: List[str]):
+def __initialize_values_with_engine(
+        puzzle: RegularSudoku,
+        legalValues: List[str],
+        engine: RegularSolverEngine,
+        valueOrders: Optional[List[List[int]]],
+        generator: Random
+):
+    """
+    Completes the board with the first solution found by the given solver engine. Every cell tries its values in its
+    own shuffled order so that the completed board is random. Shall only be called from within the
+    ValueInitialization.py file
+    :param puzzle: The sudoku board to be completed
+    :param legalValues: The list of values that are allowed for this sudoku board
+    :param engine: The solver engine used to complete the board
+    :param valueOrders: A list of value indices for every cell, to be shuffled in place and reused. New lists are made
+        if None
+    :param generator: The random number generator used to shuffle the value orders
+    :raises StateError: If the sudoku board is not in a solved state by the end of this function
+    """
+
+    length = puzzle.length
+
+    if valueOrders is None:
+        valueOrders = [generator.sample(range(length), length) for _ in range(length * length)]
+    else:
+        for order in valueOrders:
+            generator.shuffle(order)
+
+    solutions = _solutions(puzzle, engine, valueOrders)
+    solution = next(solutions, None)
+
+    if solution is not None:
+        for (index, valueIndex) in enumerate(solution):
+            (rowIndex, colIndex) = divmod(index, length)
+
+            if puzzle.get(rowIndex, colIndex) is None:
+                puzzle.set(rowIndex, colIndex, legalValues[valueIndex])
+
+    solutions.close()
+
+    if not puzzle.is_solved():
+        raise StateError(f"Sudoku board must be solved by this point\n{puzzle}")
+
+def __initialize_values_from_pattern(puzzle: RegularSudoku, legalValues: List[str], generator: Random):
+    """
+    Fills the board from a fixed pattern in which each row is the row above it shifted by the number of columns in a
+    box, with an extra shift of one at the start of every band. The values, bands, stacks, rows within each band and
+    columns within each stack are then permuted at random, along with a transposition if the boxes are square. Each of
+    these permutations keeps every row, column and box valid, so no search is needed. Shall only be called from within
+    the ValueInitialization.py file
+    :param puzzle: The sudoku board to be filled
+    :param legalValues: The list of values that are allowed for this sudoku board
+    :param generator: The random number generator used to permute the pattern
+    :raises StateError: If the sudoku board is not in a solved state by the end of this function
+    """
+
+    length = puzzle.length
+    boxRows = puzzle.box_rows
+    boxCols = puzzle.box_cols
+    values = generator.sample(legalValues, length)
+    rowOrder = _permuted_lines(length // boxRows, boxRows, generator)
+    colOrder = _permuted_lines(length // boxCols, boxCols, generator)
+    transpose = boxRows == boxCols and generator.random() < 0.5
+
+    for rowIndex in range(length):
+        patternRow = rowOrder[rowIndex]
+        shift = boxCols * (patternRow % boxRows) + patternRow // boxRows
+
+        for colIndex in range(length):
+            value = values[(shift + colOrder[colIndex]) % length]
+
+            if transpose:
+                puzzle.set(colIndex, rowIndex, value)
+            else:
+                puzzle.set(rowIndex, colIndex, value)
+
+    if not puzzle.is_solved():
+        raise StateError(f"Sudoku board must be solved by this point\n{puzzle}")
+
+def _initialize_values(
+        puzzle: RegularSudoku,
+        legalValues: List[str],
+        generator: Random,
+        engine: Optional[RegularSolverEngine]=None,
+        fill: RegularFillMethod=RegularFillMethod.SEARCH,
+        valueOrders: Optional[List[List[int]]]=None
+):
     """
     Initializes an empty sudoku board with some values. The board shall be completely filled with a collection of
     values to make up a valid sudoku board. Shall only be called from within the sudoku package
@@ -129,12 +390,32 @@ def _initialize_values(puzzle: RegularSudoku, legalValues: List[str]):
     :param legalValues: A list of the allowed values for use in the board being initialized. Each value must be
         distinct, must be a string consisting of a single character, must have a length that is equal to the number of
         rows and columns in the sudoku board and must be in sorted order
+    :param generator: The random number generator that every random choice made while filling the board is drawn from
+    :param engine: The solver engine used to complete the board after the independent boxes are filled. The engine
+        of the board's dimensions is used if None
+    :param fill: The fill method used to make the board. The engine is only used by the search fill
+    :param valueOrders: A list of value indices for every cell, reused by the solver engine between boards of the
+        same dimensions. Only used by the search fill. New lists are made if None
     :raises StateError: If the sudoku board was not initialized properly and is not in a solved state by the end of
         initialization. This should never occur and, if it does, it means there is a problem with this function
     """
 
-    __initialize_values_helper1(puzzle, legalValues)
+    if RegularFillMethod.PATTERN == fill:
+        __initialize_values_from_pattern(puzzle, legalValues, generator)
+        return
+
+    __initialize_values_helper1(puzzle, legalValues, generator)
+
+    if RegularFillMethod.BACKTRACK == fill:
+        units = __units(puzzle)
+
+        __propagate(puzzle, legalValues, units)
+
+        valueDict = __shuffle_values(legalValues, puzzle, generator)
 
-    valueDict = __shuffle_values(legalValues, puzzle)
+        __initialize_values_helper2(puzzle, valueDict, units)
+    else:
+        if engine is None:
+            engine = puzzle.engine
 
-    __initialize_values_helper2(puzzle, valueDict, 0, 0)
+        __initialize_values_with_engine(puzzle, legalValues, engine, valueOrders, generator)
@@ -1,3 +1,12 @@
 from sudoku.StateError import StateError
-from sudoku.RegularSudoku import RegularDimension, RegularDifficulty, RegularInfo, RegularSudoku
-from sudoku.Generation import generate_regular
+from sudoku.SolverStats import SolverStats
+from sudoku.SolverBudget import SolverBudget
+from sudoku.RegularSudoku import RegularDimension, RegularDifficulty, RegularInfo, RegularSolverEngine, RegularFillMethod, RegularSudoku
+from sudoku.GenerationThroughput import GenerationThroughput
+from sudoku.Generation import generate_regular, generate_regular_many, iter_regular
+from sudoku.Generation import regular_isomorphs, generate_regular_isomorphs, generate_regular_ladder
+from sudoku.AsyncGeneration import generate_regular_async, check_unique_async
+from sudoku.RegularPuzzlePool import RegularPuzzlePool
+from sudoku.RegularSolver import solve
+from sudoku.BatchSolver import solve_many, check_unique_many
+from sudoku.BatchChecker import check_regular_many